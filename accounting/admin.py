@@ -102,6 +102,8 @@ class CustomerBillingAdmin(BaseModelAdmin):
     """CustomerBilling admin."""
     list_select_related = (
         'docket',
+        'customer_individual',
+        'customer_company'
     )
     list_display = (
         'customer',
@@ -141,6 +143,7 @@ class SupplierBillingAdmin(BaseModelAdmin):
     """SupplierBilling admin."""
     list_select_related = (
         'docket',
+        'supplier'
     )
     list_display = (
         'supplier',
@@ -138,6 +138,7 @@ class CustomerBilling(BaseModel):
         """Model meta."""
         verbose_name = _('billing (customer)')
         verbose_name_plural = _('billings (customer)')
+        indexes = BaseModel.Meta.indexes
 
     def customer(self):
         """
@@ -260,6 +261,7 @@ class SupplierBilling(BaseModel):
         """Model meta."""
         verbose_name = _('billing (supplier)')
         verbose_name_plural = _('billings (supplier)')
+        indexes = BaseModel.Meta.indexes
 
     def __str__(self):
         return str(self.id)
@@ -3,11 +3,20 @@
 from accounting.admin import (AccountingDocumentInline, CustomerBillingInline,
                               PaymentInline, SupplierBillingInline)
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
 from django.utils.translation import ugettext_lazy as _
 from freight.models import Cargo, Docket
 from netexgl.admin import BaseModelAdmin, BaseTabularInline
+from netexgl.paginator import KeysetChangeList
+from netexgl.search import TrigramSearchMixin
 
 from .models import Cargo, Document
+from .numbering import get_last_docket_number
+from .search import get_docket_search_query
+from .workers import stream_docket_reports_zip
 
 
 class CargoInline(BaseTabularInline):
@@ -29,9 +38,33 @@ class FreightDocumentInline(BaseTabularInline):
     )
 
 
+class DocketChangeList(KeysetChangeList):
+    """
+    Docket changelist ordering searches by relevance, which are then
+    paginated by offset. The search vector is not loaded.
+    """
+
+    def get_queryset(self, request):
+        """Get queryset method."""
+        # Search results are annotated after the ordering is set.
+        queryset = super().get_queryset(request).defer('search_vector')
+        if ORDER_VAR not in self.params and \
+                'search_rank' in queryset.query.annotations:
+            queryset = queryset.order_by(
+                '-search_rank', *queryset.query.order_by
+            )
+        return queryset
+
+
 @admin.register(Docket)
-class DocketAdmin(BaseModelAdmin):
+class DocketAdmin(TrigramSearchMixin, BaseModelAdmin):
     """Docket admin."""
+    list_select_related = (
+        'shipper_individual',
+        'shipper_company',
+        'consignee_individual',
+        'consignee_company'
+    )
     list_display = (
         'get_print_url',
         'docket_number_id',
@@ -190,25 +223,56 @@ class DocketAdmin(BaseModelAdmin):
         'previous_import_docket',
         'previous_export_docket'
     )
+    actions = [
+        'print_dockets_zip'
+    ]
 
     class Media:
         js = ("js/admin.js",)
 
+    def print_dockets_zip(self, request, queryset): # pylint: disable=W0613,R0201
+        """Stream a ZIP file with the reports of the selected dockets."""
+        response = StreamingHttpResponse(
+            stream_docket_reports_zip(queryset),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="' \
+            + str(_('Docket')) + ' ' + str(_('Reports')) + '.zip"'
+        return response
+
+    print_dockets_zip.short_description = _('Print selected dockets (ZIP)')
+
+    def get_search_query(self, request, queryset, bit):
+        """Also match each word on the docket search vector."""
+        query = super().get_search_query(request, queryset, bit)
+        search_query = get_docket_search_query(bit)
+        if search_query is not None:
+            query |= Q(search_vector=search_query)
+        return query
+
+    def get_search_results(self, request, queryset, search_term):
+        """Rank the search results by relevance."""
+        queryset, use_distinct = super().get_search_results(
+            request, queryset, search_term
+        )
+        search_query = get_docket_search_query(search_term)
+        if search_query is not None:
+            queryset = queryset.annotate(
+                search_rank=SearchRank(F('search_vector'), search_query)
+            )
+        return queryset, use_distinct
+
+    def get_changelist(self, request, **kwargs):
+        """Get changelist method."""
+        return DocketChangeList
+
     def previous_export_docket(self, instance): # pylint: disable=W0613,R0201
         """Get previous export docket number."""
-        if Docket.objects.filter(docket_type="Export").last():
-            return Docket.objects.filter(
-                docket_type="Export"
-            ).first().docket_number_id
-        return ' - '
+        return get_last_docket_number('Export') or ' - '
 
     def previous_import_docket(self, instance): # pylint: disable=W0613,R0201
         """Get previous import docket number."""
-        if Docket.objects.filter(docket_type="Import").last():
-            return Docket.objects.filter(
-                docket_type="Import"
-            ).first().docket_number_id
-        return ' - '
+        return get_last_docket_number('Import') or ' - '
 
     previous_export_docket.short_description = _('Previous Export Docket')
     previous_import_docket.short_description = _('Previous Import Docket')
@@ -1,6 +1,7 @@
 """freight.apps.py"""
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -8,3 +9,8 @@ class FreightConfig(AppConfig):
     """App config."""
     name = 'freight'
     verbose_name = _("Freight")
+
+    def ready(self):
+        """Connect app signals."""
+        from .signals import setup_docket_numbering # pylint: disable=C0415
+        post_migrate.connect(setup_docket_numbering, sender=self)
@@ -0,0 +1,126 @@
+"""freight.cache.py"""
+
+import os
+from glob import glob
+from hashlib import md5
+
+from accounting.models import CustomerBilling, Payment, SupplierBilling
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, OuterRef, Subquery
+from django.utils.http import quote_etag
+from django.utils.translation import get_language
+
+from .models import Cargo, Docket
+from .settings import DOCKET_REPORT_CACHE_TIMEOUT, DOCKET_REPORT_DIR
+
+# Rows printed on the docket report.
+DOCKET_REPORT_MODELS = (Cargo, SupplierBilling, CustomerBilling, Payment)
+
+# Parties printed on the docket report.
+DOCKET_REPORT_PARTIES = (
+    'shipper_individual',
+    'shipper_company',
+    'consignee_individual',
+    'consignee_company',
+    'carrier'
+)
+
+# Parties printed on the rows of the docket report.
+DOCKET_REPORT_ROW_PARTIES = (
+    (SupplierBilling, 'supplier'),
+    (CustomerBilling, 'customer_company'),
+    (CustomerBilling, 'customer_individual'),
+)
+
+
+def get_docket_report_key(pk, language=None):
+    """Get the cache key of a docket report."""
+    return 'freight:docket_report:{0}:{1}'.format(
+        pk, language or get_language()
+    )
+
+
+def get_latest_update(model, field='updated_at'):
+    """
+    Get a subquery with the latest update of the rows of a docket, or of
+    a party of its rows.
+    """
+    return Subquery(
+        model.objects.filter(
+            docket=OuterRef('pk')
+        ).order_by().values('docket').annotate(
+            latest=Max(field)
+        ).values('latest')
+    )
+
+
+def get_docket_report_version(pk):
+    """
+    Get the last modification and the ETag of a docket report in a
+    single query, or None if the docket does not exist.
+    """
+    annotations = {
+        model._meta.model_name + '_updated_at': get_latest_update(model)
+        for model in DOCKET_REPORT_MODELS
+    }
+    annotations.update({
+        party + '_updated_at': get_latest_update(
+            model, party + '__updated_at'
+        )
+        for model, party in DOCKET_REPORT_ROW_PARTIES
+    })
+    fields = ['updated_at', *annotations] + [
+        party + '__updated_at' for party in DOCKET_REPORT_PARTIES
+    ]
+    dates = Docket.objects.filter(id=pk).annotate(
+        **annotations
+    ).values_list(*fields).first()
+    if dates is None:
+        return None
+    last_modified = max(date for date in dates if date is not None)
+    etag = md5('{0}:{1}:{2}'.format(
+        pk, get_language(), last_modified.isoformat()
+    ).encode()).hexdigest()
+    return last_modified, quote_etag(etag)
+
+
+def get_docket_report_path(pk, etag, language=None):
+    """Get the path of the file of a docket report version."""
+    return os.path.join(DOCKET_REPORT_DIR, '{0}-{1}-{2}.pdf'.format(
+        pk, etag.strip('"'), language or get_language()
+    ))
+
+
+def get_cached_docket_report(pk, etag, language=None):
+    """
+    Get the filename and path of a cached docket report, or None if it
+    is not cached or its file is gone, such as on another host.
+    """
+    cached = cache.get(get_docket_report_key(pk, language))
+    if cached is None or cached[0] != etag or not os.path.exists(cached[2]):
+        return None
+    return cached[1:]
+
+
+def set_cached_docket_report(pk, etag, filename, path, language=None):
+    """Cache the filename and path of a docket report."""
+    cache.set(
+        get_docket_report_key(pk, language),
+        (etag, filename, path),
+        DOCKET_REPORT_CACHE_TIMEOUT
+    )
+
+
+def delete_cached_docket_report(pk):
+    """Delete a docket report from cache and its files on every language."""
+    cache.delete_many([
+        get_docket_report_key(pk, language)
+        for language, _name in settings.LANGUAGES
+    ])
+    # Files being read stay readable until they are closed.
+    for path in glob(os.path.join(DOCKET_REPORT_DIR, '{0}-*.pdf'.format(pk))):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1 @@
+"""freight.management.__init__.py"""
@@ -0,0 +1 @@
+"""freight.management.commands.__init__.py"""
@@ -0,0 +1,132 @@
+"""freight.management.commands.benchmark_changelist_pagination.py"""
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from .benchmark_docket_print import get_percentile
+
+# Synthetic table, laid out as the BaseModel columns and keyset index.
+CREATE_TABLE = '''
+CREATE TEMPORARY TABLE benchmark_changelist AS
+SELECT
+    md5(i::text)::uuid AS id,
+    now() - i * interval '1 second' AS created_at,
+    md5((i * 7)::text) AS note
+FROM generate_series(1, %s) AS i
+'''
+CREATE_INDEX = '''
+CREATE INDEX benchmark_changelist_ks ON benchmark_changelist (created_at, id)
+'''
+
+# Page queries as the changelist runs them, newest rows first.
+OFFSET_QUERY = '''
+SELECT id, created_at, note FROM benchmark_changelist
+ORDER BY created_at DESC, id DESC
+LIMIT %s OFFSET %s
+'''
+KEYSET_QUERY = '''
+SELECT id, created_at, note FROM benchmark_changelist
+WHERE created_at <= %s AND NOT (created_at = %s AND id >= %s)
+ORDER BY created_at DESC, id DESC
+LIMIT %s
+'''
+CURSOR_QUERY = '''
+SELECT created_at, id FROM benchmark_changelist
+ORDER BY created_at DESC, id DESC
+LIMIT 1 OFFSET %s
+'''
+
+
+def time_query(cursor, sql, params, iterations):
+    """Get the timings of a query."""
+    timings = []
+    for _iteration in range(iterations):
+        start = perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append(perf_counter() - start)
+    return timings
+
+
+class Command(BaseCommand):
+    """Benchmark the offset and keyset pagination of changelists."""
+    help = (
+        'Fill a temporary table of synthetic rows and compare the offset '
+        'and keyset page queries of the admin changelists at several '
+        'page depths.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000000,
+            help='Number of synthetic rows.'
+        )
+        parser.add_argument(
+            '--per-page',
+            type=int,
+            default=100,
+            help='Number of rows per page.'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            nargs='+',
+            default=[1, 10, 100, 1000, 5000, 9000],
+            help='Page numbers benchmarked.'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10,
+            help='Number of runs of each page query.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This benchmark needs PostgreSQL.')
+        per_page = max(1, options['per_page'])
+        iterations = max(1, options['iterations'])
+        with connection.cursor() as cursor:
+            self.stdout.write('Creating {0} rows.'.format(options['rows']))
+            cursor.execute(CREATE_TABLE, [options['rows']])
+            cursor.execute(CREATE_INDEX)
+            cursor.execute('ANALYZE benchmark_changelist')
+            for page in options['pages']:
+                offset = (page - 1) * per_page
+                if offset >= options['rows']:
+                    continue
+                timings = {
+                    'offset': time_query(
+                        cursor,
+                        OFFSET_QUERY,
+                        [per_page, offset],
+                        iterations
+                    )
+                }
+                # The cursor is the last row of the previous page.
+                if offset:
+                    cursor.execute(CURSOR_QUERY, [offset - 1])
+                    created_at, pk = cursor.fetchone()
+                    timings['keyset'] = time_query(
+                        cursor,
+                        KEYSET_QUERY,
+                        [created_at, created_at, pk, per_page],
+                        iterations
+                    )
+                else:
+                    timings['keyset'] = timings['offset']
+                self.stdout.write(
+                    'page {0}: offset p50 {1:.2f} ms, p95 {2:.2f} ms; '
+                    'keyset p50 {3:.2f} ms, p95 {4:.2f} ms'.format(
+                        page,
+                        get_percentile(timings['offset'], 50) * 1000,
+                        get_percentile(timings['offset'], 95) * 1000,
+                        get_percentile(timings['keyset'], 50) * 1000,
+                        get_percentile(timings['keyset'], 95) * 1000
+                    )
+                )
+            cursor.execute('DROP TABLE benchmark_changelist')
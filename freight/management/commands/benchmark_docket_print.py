@@ -0,0 +1,264 @@
+"""freight.management.commands.benchmark_docket_print.py"""
+
+import os
+import resource
+import tracemalloc
+from decimal import Decimal
+from time import perf_counter
+
+from accounting.models import CustomerBilling, Payment, SupplierBilling
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import get_language
+from freight.models import Cargo, Docket
+from freight.reports import DocketReport
+from freight.workers import render_docket_report
+from thirdparty.models import Company, Individual
+
+# Rows and note length of a synthetic docket.
+SHAPE_KEYS = ('cargo', 'supplier', 'customer', 'payment', 'notes')
+
+# Shapes benchmarked by default.
+DEFAULT_SHAPES = [
+    {'cargo': 10},
+    {'cargo': 100},
+    {'cargo': 1000},
+    {'cargo': 50, 'supplier': 50, 'customer': 50, 'payment': 20},
+    {'cargo': 10, 'supplier': 5, 'customer': 5, 'payment': 2,
+     'notes': 5000},
+]
+
+
+def parse_shape(value):
+    """Parse a shape such as cargo=100,supplier=20,notes=500."""
+    shape = {}
+    for item in value.split(','):
+        key, _sep, count = item.partition('=')
+        if key not in SHAPE_KEYS or not count.isdigit():
+            raise CommandError(
+                'Invalid shape {0}, use {1}=N separated by commas.'.format(
+                    value, '=N,'.join(SHAPE_KEYS)
+                )
+            )
+        shape[key] = int(count)
+    return shape
+
+
+def format_shape(shape):
+    """Format a shape on a single line."""
+    return ','.join(
+        '{0}={1}'.format(key, shape.get(key, 0)) for key in SHAPE_KEYS
+    )
+
+
+def get_synthetic_docket(cargo_lines, notes=0):
+    """Get an unsaved docket with synthetic cargo lines."""
+    note = ('Lorem ipsum dolor sit amet. ' * (notes // 28 + 1))[:notes]
+    docket = Docket(
+        docket_number_id='UI-0',
+        docket_type='Import',
+        shipper_company=Company(company_name='Shipper Company'),
+        consignee_individual=Individual(
+            first_name='Consignee',
+            last_name='Individual'
+        ),
+        carrier=Company(company_name='Carrier Company'),
+        origin_address_line1='1 Origin Street',
+        origin_city_district='Toronto',
+        origin_state_province='Ontario',
+        origin_postal_code='M5V 2T6',
+        origin_country='Canada',
+        destination_address_line1='1 Destination Street',
+        destination_city_district='Miami',
+        destination_state_province='Florida',
+        destination_postal_code='33101',
+        destination_country='United States of America',
+        note=note or None,
+        tracking_notes=note or None,
+        shipment_notes=note or None,
+        customer_notes=note or None,
+        dispute_notes=note or None,
+    )
+    cargos = [
+        Cargo(
+            docket=docket,
+            description='Cargo line {0}'.format(i),
+            quantity=i,
+            piece_unit='Box',
+            weight=10.5,
+            weight_unit='Kg',
+            length=1.2,
+            width=0.8,
+            height=1.0,
+            dimension_unit='Cm'
+        )
+        for i in range(cargo_lines)
+    ]
+    return docket, cargos
+
+
+def get_synthetic_report(shape):
+    """Get the report of an unsaved docket of the given shape."""
+    docket, cargos = get_synthetic_docket(
+        shape.get('cargo', 0), shape.get('notes', 0)
+    )
+    supplier = Company(company_name='Supplier Company')
+    customer = Company(company_name='Customer Company')
+    supplier_billings = [
+        SupplierBilling(
+            docket=docket,
+            bill_to='1',
+            supplier=supplier,
+            supplier_service='Freight',
+            price=Decimal('100.00'),
+            currency='USD',
+            bill_no='B-{0}'.format(i),
+            bill_paid=bool(i % 2)
+        )
+        for i in range(shape.get('supplier', 0))
+    ]
+    customer_billings = [
+        CustomerBilling(
+            docket=docket,
+            bill_to='1',
+            customer_company=customer,
+            customer_service='Freight',
+            price=Decimal('150.00'),
+            currency='USD',
+            invoice_no='I-{0}'.format(i)
+        )
+        for i in range(shape.get('customer', 0))
+    ]
+    payments = [
+        Payment(
+            docket=docket,
+            payment_type='Check',
+            payment_transfer_number='T-{0}'.format(i),
+            invoice_no='I-{0}'.format(i)
+        )
+        for i in range(shape.get('payment', 0))
+    ]
+    return DocketReport(
+        docket,
+        cargos=cargos,
+        supplier_billings=supplier_billings,
+        customer_billings=customer_billings,
+        payments=payments,
+    )
+
+
+def get_percentile(timings, percentile):
+    """Get the nearest-rank percentile of a list of timings."""
+    timings = sorted(timings)
+    index = max(0, -(-len(timings) * percentile // 100) - 1)
+    return timings[int(index)]
+
+
+def get_allocations(report):
+    """Get the peak memory allocated to lay out the content of a report."""
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        report.get_content()
+        return tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+
+
+def render_report(report):
+    """Render a report into a file as the print view does, returns its size."""
+    path = render_docket_report(report, get_language())[1]
+    try:
+        return os.path.getsize(path)
+    finally:
+        os.unlink(path)
+
+
+def get_peak_memory(report):
+    """Get the peak memory used to render a report into a file."""
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        size = render_report(report)
+        return tracemalloc.get_traced_memory()[1] - start, size
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    """Benchmark the docket PDF report rendering."""
+    help = (
+        'Render synthetic dockets of several shapes as the print view '
+        'does, and report p50/p95 latency, peak RSS and output size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shape',
+            type=parse_shape,
+            action='append',
+            dest='shapes',
+            help=(
+                'Shape of a benchmarked docket, such as '
+                'cargo=100,supplier=20,customer=20,payment=5,notes=500. '
+                'Can be repeated.'
+            )
+        )
+        parser.add_argument(
+            '--cargo-lines',
+            type=int,
+            nargs='+',
+            default=[],
+            help='Benchmark dockets with only these numbers of cargo lines.'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10,
+            help='Number of renders of each docket.'
+        )
+        parser.add_argument(
+            '--allocations',
+            action='store_true',
+            help='Report the memory allocated to lay out each docket.'
+        )
+        parser.add_argument(
+            '--memory',
+            action='store_true',
+            help='Report the peak memory used to render each docket.'
+        )
+
+    def handle(self, *args, **options):
+        shapes = (options['shapes'] or []) + [
+            {'cargo': cargo_lines} for cargo_lines in options['cargo_lines']
+        ]
+        for shape in shapes or DEFAULT_SHAPES:
+            report = get_synthetic_report(shape)
+            timings = []
+            for _iteration in range(max(1, options['iterations'])):
+                start = perf_counter()
+                size = render_report(report)
+                timings.append(perf_counter() - start)
+            self.stdout.write(
+                '{0}: p50 {1:.3f} s, p95 {2:.3f} s, '
+                'peak RSS {3:.1f} MiB, output {4:.1f} KiB'.format(
+                    format_shape(shape),
+                    get_percentile(timings, 50),
+                    get_percentile(timings, 95),
+                    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                    size / 1024
+                )
+            )
+            if options['allocations']:
+                self.stdout.write(
+                    '{0}: {1:.1f} KiB allocated'.format(
+                        format_shape(shape), get_allocations(report) / 1024
+                    )
+                )
+            if options['memory']:
+                peak, size = get_peak_memory(report)
+                self.stdout.write(
+                    '{0}: {1:.1f} KiB peak, {2:.1f} KiB output'.format(
+                        format_shape(shape), peak / 1024, size / 1024
+                    )
+                )
@@ -0,0 +1,173 @@
+"""freight.management.commands.check_docket_query_plans.py"""
+
+import json
+from datetime import timedelta
+from uuid import UUID
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from freight.models import Docket
+from freight.search import search_dockets
+from netexgl.db import (explain_queryset, get_trigram_index_name,
+                        iter_plan_nodes)
+
+# Rows of a changelist page.
+PAGE_SIZE = 100
+
+# Docket date fields filtered by range in the changelist.
+DATE_FILTERS = (
+    'etd',
+    'eta_1',
+    'eta_2',
+    'storage_start_date',
+    'obl_to_shipping_line_sent_date',
+    'documents_to_broker_sent_date',
+    'documents_to_carrier_sent_date',
+    'arrival_notice_received_date',
+    'isf_filled_date',
+    'release_date',
+    'pickup_date',
+)
+
+
+def get_date_index_name(field_name):
+    """Get the name of the index of a docket date field."""
+    column = Docket._meta.get_field(field_name).column
+    return connection.schema_editor()._create_index_name( # pylint: disable=W0212
+        Docket._meta.db_table, [column], suffix=''
+    )
+
+
+def get_docket_querysets(search_term):
+    """
+    Get the common docket changelist queries by name, with the names of
+    the indexes their plans are expected to use. Filters and searches
+    are not ordered, so only their targeted indexes can serve them.
+    """
+    now = timezone.now()
+    today = now.date()
+    dockets = Docket.objects.order_by('-created_at', '-pk')
+    unordered = Docket.objects.order_by()
+    querysets = [
+        ('changelist', dockets, ['freight_docket_ks']),
+        ('keyset page', dockets.filter(created_at__lte=now).exclude(
+            created_at=now, pk__gte=UUID(int=0)
+        ), ['freight_docket_ks']),
+        ('created this month', unordered.filter(
+            created_at__gte=now - timedelta(days=30), created_at__lt=now
+        ), ['freight_docket_ks']),
+        ('updated recently', unordered.filter(
+            updated_at__gte=now - timedelta(days=1)
+        ), [get_date_index_name('updated_at')]),
+        ('open', unordered.filter(
+            docket_completed=False
+        ), ['freight_docket_open_ix']),
+        ('ready to invoice', unordered.filter(
+            ready_to_invoice=True, invoice_completed=False
+        ), ['freight_docket_invoice_ix']),
+        ('undelivered', unordered.filter(
+            shipment_delivered=False, docket_completed=False
+        ), ['freight_docket_undelivered_ix']),
+        ('in dispute', unordered.filter(
+            in_dispute=True
+        ), ['freight_docket_dispute_ix']),
+        ('open awaiting arrival notice', unordered.filter(
+            docket_completed=False, arrival_notice_received=False
+        ), ['freight_docket_open_ix']),
+        ('open awaiting ISF', unordered.filter(
+            docket_completed=False, isf_filled=False
+        ), ['freight_docket_open_ix']),
+    ]
+    querysets += [
+        ('{0} past 7 days'.format(field), unordered.filter(**{
+            field + '__gte': today - timedelta(days=7),
+            field + '__lt': today + timedelta(days=1),
+        }), [get_date_index_name(field)])
+        for field in DATE_FILTERS
+    ]
+    model_admin = admin.site._registry[Docket] # pylint: disable=W0212
+    querysets += [
+        ('admin search', model_admin.get_search_results(
+            None, unordered, search_term
+        )[0], [
+            get_trigram_index_name(Docket._meta.db_table, 'docket_number_id'),
+            'freight_docket_search_gin'
+        ]),
+        ('full-text search', search_dockets(
+            unordered, search_term
+        ).order_by(), ['freight_docket_search_gin']),
+    ]
+    return [
+        (name, queryset[:PAGE_SIZE], indexes)
+        for name, queryset, indexes in querysets
+    ]
+
+
+def get_seq_scans(plan):
+    """Get the tables scanned sequentially by a query plan."""
+    return sorted({
+        node.get('Relation Name', '?')
+        for node in iter_plan_nodes(plan)
+        if node['Node Type'] == 'Seq Scan'
+    })
+
+
+def get_missing_indexes(plan, indexes):
+    """Get the expected indexes not used by a query plan."""
+    used = {node.get('Index Name') for node in iter_plan_nodes(plan)}
+    return [index for index in indexes if index not in used]
+
+
+class Command(BaseCommand):
+    """Check that common docket queries use indexes."""
+    help = (
+        'Explain the common docket changelist filters and searches with '
+        'sequential scans disabled, and fail if any of them still needs '
+        'one or does not use the index it is expected to.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--search',
+            default='acme',
+            help='Search term of the search queries.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are checked on PostgreSQL.')
+        querysets = get_docket_querysets(options['search'])
+        failures = []
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Sequential scans are left only where no index applies,
+                # whatever the size of the tables.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, queryset, indexes in querysets:
+                plan = explain_queryset(queryset)
+                tables = get_seq_scans(plan)
+                missing = get_missing_indexes(plan, indexes)
+                if tables:
+                    self.stdout.write('{0}: Seq Scan on {1}'.format(
+                        name, ', '.join(tables)
+                    ))
+                if missing:
+                    self.stdout.write('{0}: {1} not used'.format(
+                        name, ', '.join(missing)
+                    ))
+                if tables or missing:
+                    failures.append(name)
+                else:
+                    self.stdout.write('{0}: OK'.format(name))
+                if options['verbosity'] > 1:
+                    self.stdout.write(json.dumps(plan, indent=2))
+        if failures:
+            raise CommandError(
+                'Unexpected plans in {0} of {1} queries: {2}.'.format(
+                    len(failures),
+                    len(querysets),
+                    ', '.join(failures)
+                )
+            )
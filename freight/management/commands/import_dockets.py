@@ -0,0 +1,72 @@
+"""freight.management.commands.import_dockets.py"""
+
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from freight.models import Docket
+
+
+class Command(BaseCommand):
+    """Bulk import dockets from a JSON lines file."""
+    help = (
+        'Import dockets from a JSON lines file, one docket per line. '
+        'Docket numbers are reserved in blocks and the dockets are '
+        'inserted with bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='JSON lines file with the docket field values.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of dockets inserted per query.'
+        )
+
+    def handle(self, *args, **options):
+        # Foreign keys are given by id under the field name.
+        foreign_keys = {
+            field.name: field.attname
+            for field in Docket._meta.concrete_fields
+            if field.is_relation
+        }
+        dockets = []
+        errors = []
+        with open(options['path'], encoding='utf-8') as lines:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    values = {
+                        foreign_keys.get(name, name): value
+                        for name, value in json.loads(line).items()
+                    }
+                    docket = Docket(**values)
+                except (AttributeError, TypeError, ValueError) as error:
+                    errors.append('Line {0}: {1}'.format(line_number, error))
+                    continue
+                try:
+                    docket.clean_fields(
+                        exclude=['docket_number_id', *foreign_keys]
+                    )
+                    docket.clean()
+                except ValidationError as error:
+                    errors.append('Line {0}: {1}'.format(
+                        line_number, '; '.join(error.messages)
+                    ))
+                dockets.append(docket)
+        if errors:
+            raise CommandError('\n'.join(errors))
+        with transaction.atomic():
+            Docket.objects.bulk_create(
+                dockets,
+                batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {0} dockets.'.format(len(dockets))
+        ))
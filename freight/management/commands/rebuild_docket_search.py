@@ -0,0 +1,39 @@
+"""freight.management.commands.rebuild_docket_search.py"""
+
+from django.core.management.base import BaseCommand
+from freight.models import Docket
+from freight.search import update_docket_search_vectors
+
+
+class Command(BaseCommand):
+    """Rebuild the docket search vectors."""
+    help = (
+        'Rebuild the search vector of all dockets in batches, after the '
+        'first migrate or after changes made with queryset updates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of dockets updated per query.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        queryset = Docket.objects.order_by('pk')
+        last_pk = None
+        total = 0
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            total += update_docket_search_vectors(
+                Docket.objects.filter(pk__in=pks)
+            )
+            last_pk = pks[-1]
+            self.stdout.write('{0} dockets updated.'.format(total))
@@ -0,0 +1,31 @@
+"""freight.management.commands.sync_docket_sequences.py"""
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from freight.models import Docket
+from freight.numbering import (DOCKET_NUMBERING, create_docket_sequences,
+                               get_last_docket_number)
+
+
+class Command(BaseCommand):
+    """Resync the docket number sequences with the stored dockets."""
+    help = (
+        'Move the docket number sequences past the highest docket number '
+        'stored of each type, after dockets are restored or imported with '
+        'their own numbers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database of the docket number sequences.'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        create_docket_sequences(Docket._meta.db_table, using)
+        for docket_type in DOCKET_NUMBERING:
+            self.stdout.write('{0}: {1}'.format(
+                docket_type, get_last_docket_number(docket_type, using) or '-'
+            ))
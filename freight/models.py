@@ -3,43 +3,67 @@
 from pathlib import PurePath
 
 from django.contrib.postgres.fields import CICharField, CITextField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.db import router, transaction
 from django.db.models import (CASCADE, PROTECT, BooleanField, DateField,
                               DateTimeField, FileField, FloatField, ForeignKey,
-                              PositiveIntegerField)
+                              Index, Manager, PositiveIntegerField, Q)
 from django.urls import reverse_lazy
 from django.utils.html import format_html
 from django.utils.translation import ugettext_lazy as _
 from freight.data import (DIMENSION_UNITS, DOCKET_TYPES, UNIT_TYPES,
                           WEIGHT_UNITS)
 from netexgl.data import COUNTRIES
+from netexgl.counts import add_daily_counts
 from netexgl.models import BaseModel
+from thirdparty.cache import get_party
 from thirdparty.models import Company, Individual
 
-from .settings import (DOCKET_EXPORT_INITIAL, DOCKET_EXPORT_PREFIX,
-                       DOCKET_IMPORT_INITIAL, DOCKET_IMPORT_PREFIX)
+from .numbering import next_docket_number, reserve_docket_numbers
+from .search import update_docket_search_vectors
 
 
-def get_docket_number_id(first, prefix, initial):
-    """Function to generate docket number id."""
-    # Check if there is a item on queryset.
-    if first:
-        # Get docket number from last item.
-        docket_number = int(''.join(
-            filter(
-                str.isdigit, first.docket_number_id
+class DocketManager(Manager):
+    """Docket manager."""
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        """Bulk create dockets reserving their numbers in blocks."""
+        objs = list(objs)
+        using = self._db or router.db_for_write(self.model)
+        # Group dockets without number by docket type.
+        pending = {}
+        for obj in objs:
+            if not obj.docket_number_id:
+                pending.setdefault(obj.docket_type, []).append(obj)
+        with transaction.atomic(using=using):
+            for docket_type, dockets in pending.items():
+                numbers = reserve_docket_numbers(
+                    docket_type, len(dockets), using
                 )
+                for obj, number in zip(dockets, numbers):
+                    obj.docket_number_id = number
+            objs = super().bulk_create(
+                objs,
+                batch_size=batch_size,
+                ignore_conflicts=ignore_conflicts
             )
-        )
-        # Increment docket number.
-        object_number = docket_number + 1
-        # Return number with prefix.
-        return str(prefix) + '-' + str(object_number)
-    # Increment initial docket number.
-    object_number = int(initial) + 1
-    # Return number with prefix.
-    return str(prefix) + '-' + str(object_number)
+            # Signals are not sent, build the search vectors and count
+            # the dockets here.
+            inserted = self.filter(pk__in=[obj.pk for obj in objs])
+            update_docket_search_vectors(inserted)
+            created = [obj.created_at for obj in objs]
+            if ignore_conflicts:
+                # Only the rows written by this call are counted.
+                rows = set(inserted.values_list('pk', 'created_at'))
+                created = [
+                    obj.created_at for obj in objs
+                    if (obj.pk, obj.created_at) in rows
+                ]
+            add_daily_counts(self.model, created, using=using)
+            return objs
 
 
 class Docket(BaseModel):
@@ -265,17 +289,20 @@ class Docket(BaseModel):
     etd = DateField(
         _('Est. Time of Delivery'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     eta_1 = DateField(
         _('Est. Time of Arrival 1'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     eta_2 = DateField(
         _('Est. Time of Arrival 2'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     tracking_notes = CITextField(
         _('Tracking Note'),
@@ -285,7 +312,8 @@ class Docket(BaseModel):
     storage_start_date = DateField(
         _('Storage Start Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     skids_exchange = BooleanField(
         _('Skids Exchange'),
@@ -298,7 +326,8 @@ class Docket(BaseModel):
     obl_to_shipping_line_sent_date = DateField(
         _('OBL To Shipping Line Sent Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     documents_to_broker_sent = BooleanField(
         _('Documents To Broker Sent'),
@@ -307,7 +336,8 @@ class Docket(BaseModel):
     documents_to_broker_sent_date = DateField(
         _('Documents To Broker Sent Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     documents_to_carrier_sent = BooleanField(
         _('Documents To Carrier Sent'),
@@ -316,7 +346,8 @@ class Docket(BaseModel):
     documents_to_carrier_sent_date = DateField(
         _('Documents To Carrier Sent Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     arrival_notice_received = BooleanField(
         _('Arrival Notice Received'),
@@ -325,7 +356,8 @@ class Docket(BaseModel):
     arrival_notice_received_date = DateField(
         _('Arrival Notice Received Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     isf_filled = BooleanField(
         _('ISF Filled'),
@@ -334,17 +366,20 @@ class Docket(BaseModel):
     isf_filled_date = DateField(
         _('ISF Filled Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     release_date = DateField(
         _('Release Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     pickup_date = DateField(
         _('Pickup Date'),
         blank=True,
-        null=True
+        null=True,
+        db_index=True
     )
     shipment_notes = CITextField(
         _('Shipment Note'),
@@ -385,6 +420,44 @@ class Docket(BaseModel):
         blank=True,
         null=True
     )
+    search_vector = SearchVectorField(
+        _('Search Vector'),
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    objects = DocketManager()
+
+    class Meta(BaseModel.Meta):
+        """Model meta."""
+        indexes = BaseModel.Meta.indexes + [
+            GinIndex(
+                fields=['search_vector'],
+                name='freight_docket_search_gin'
+            ),
+            # Open work filters, in changelist order.
+            Index(
+                fields=['created_at', 'id'],
+                name='freight_docket_open_ix',
+                condition=Q(docket_completed=False)
+            ),
+            Index(
+                fields=['created_at', 'id'],
+                name='freight_docket_invoice_ix',
+                condition=Q(ready_to_invoice=True, invoice_completed=False)
+            ),
+            Index(
+                fields=['created_at', 'id'],
+                name='freight_docket_undelivered_ix',
+                condition=Q(shipment_delivered=False, docket_completed=False)
+            ),
+            Index(
+                fields=['created_at', 'id'],
+                name='freight_docket_dispute_ix',
+                condition=Q(in_dispute=True)
+            )
+        ]
 
     def get_print_url(self):
         '''
@@ -398,51 +471,58 @@ class Docket(BaseModel):
         )
     get_print_url.short_description = _('Print')
 
+    def get_party(self, field_name):
+        """
+        Get a party of the docket, from the party cache unless it is
+        already loaded.
+        """
+        field = self._meta.get_field(field_name)
+        if not field.is_cached(self):
+            pk = getattr(self, field.attname)
+            field.set_cached_value(
+                self, get_party(field.related_model, pk) if pk else None
+            )
+        return getattr(self, field_name)
+
     def shipper(self):
         """Get shipper."""
-        if self.shipper_individual is not None:
-            return self.shipper_individual
-        return self.shipper_company
+        if self.shipper_individual_id is not None:
+            return self.get_party('shipper_individual')
+        return self.get_party('shipper_company')
 
     def consignee(self):
         """Get consignee."""
-        if self.consignee_individual is not None:
-            return self.consignee_individual
-        return self.consignee_company
+        if self.consignee_individual_id is not None:
+            return self.get_party('consignee_individual')
+        return self.get_party('consignee_company')
 
     def clean(self):
         """Clean method."""
         # Check that only one shipper type can be set.
-        if not self.shipper_individual and not self.shipper_company:
+        if not self.shipper_individual_id and not self.shipper_company_id:
             raise ValidationError(_('Shipper must be set.'))
         # Check that only one consignee type can be set.
-        if not self.consignee_individual and not self.consignee_company:
+        if not self.consignee_individual_id and \
+                not self.consignee_company_id:
             raise ValidationError(_('Consignee must be set.'))
         # Check that only one shipper type is set.
-        if self.shipper_individual and self.shipper_company:
+        if self.shipper_individual_id and self.shipper_company_id:
             raise ValidationError(_('Only one shipper type can be set.'))
         # Check that only one consignee type is set.
-        if self.consignee_individual and self.consignee_company:
+        if self.consignee_individual_id and self.consignee_company_id:
             raise ValidationError(_('Only one consignee type can be set.'))
-        # Check if no docket number has been set.
+
+    def save(self, *args, **kwargs):
+        """Save method."""
+        # Allocate the docket number from the sequence of its type.
         if not self.docket_number_id:
-            # Create Docket Number for export docket.
-            if self.docket_type == 'Export':
-                docket_number = get_docket_number_id(
-                    Docket.objects.filter(docket_type='Export').first(),
-                    DOCKET_EXPORT_PREFIX,
-                    DOCKET_EXPORT_INITIAL
+            self.docket_number_id = next_docket_number(
+                self.docket_type,
+                kwargs.get('using') or router.db_for_write(
+                    type(self), instance=self
                 )
-                self.docket_number_id = docket_number
-            # Create Docket Number for import docket.
-            if self.docket_type == "Import":
-                # Remove delete from previous docket.
-                docket_number = get_docket_number_id(
-                    Docket.objects.filter(docket_type='Import').first(),
-                    DOCKET_IMPORT_PREFIX,
-                    DOCKET_IMPORT_INITIAL
-                )
-                self.docket_number_id = docket_number
+            )
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return str(self.docket_number_id)
@@ -0,0 +1,149 @@
+"""freight.numbering.py"""
+
+from django.db import connections, transaction
+
+from .settings import (DOCKET_EXPORT_INITIAL, DOCKET_EXPORT_PREFIX,
+                       DOCKET_EXPORT_SEQUENCE, DOCKET_IMPORT_INITIAL,
+                       DOCKET_IMPORT_PREFIX, DOCKET_IMPORT_SEQUENCE,
+                       DOCKET_RESERVE_ATTEMPTS)
+
+# Prefix, initial number and sequence of every docket type.
+DOCKET_NUMBERING = {
+    'Import': (
+        DOCKET_IMPORT_PREFIX,
+        DOCKET_IMPORT_INITIAL,
+        DOCKET_IMPORT_SEQUENCE
+    ),
+    'Export': (
+        DOCKET_EXPORT_PREFIX,
+        DOCKET_EXPORT_INITIAL,
+        DOCKET_EXPORT_SEQUENCE
+    ),
+}
+
+
+def get_docket_numbering(docket_type):
+    """Get prefix, initial number and sequence of a docket type."""
+    try:
+        return DOCKET_NUMBERING[docket_type]
+    except KeyError:
+        raise ValueError(
+            'Unknown docket type: {0}'.format(docket_type)
+        ) from None
+
+
+def format_docket_number(prefix, number):
+    """Return docket number with prefix."""
+    return str(prefix) + '-' + str(number)
+
+
+def create_docket_sequences(docket_table, using='default'):
+    """
+    Create the docket number sequences and seed them with the highest
+    number between the initial number, the current sequence value and
+    the dockets already stored.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for docket_type, numbering in DOCKET_NUMBERING.items():
+            _prefix, initial, sequence = numbering
+            cursor.execute(
+                'CREATE SEQUENCE IF NOT EXISTS {0} AS bigint'.format(
+                    connection.ops.quote_name(sequence)
+                )
+            )
+            cursor.execute(
+                '''
+                SELECT setval(%s, GREATEST(seed.number, 1), seed.number >= 1)
+                FROM (
+                    SELECT GREATEST(
+                        %s,
+                        (SELECT CASE WHEN is_called THEN last_value
+                            ELSE last_value - 1 END FROM {0}),
+                        (SELECT MAX(SUBSTRING(
+                            docket_number_id::text FROM '[0-9]+')::bigint)
+                            FROM {1} WHERE docket_type = %s)
+                    ) AS number
+                ) AS seed
+                '''.format(
+                    connection.ops.quote_name(sequence),
+                    connection.ops.quote_name(docket_table)
+                ),
+                [sequence, int(initial), docket_type]
+            )
+
+
+def sync_docket_sequences(docket_table, using='default'):
+    """
+    Resync the docket number sequences with the dockets stored, once the
+    current transaction is committed, such as after dockets are loaded
+    from a fixture with their numbers. Scheduled once per transaction.
+    """
+    connection = connections[using]
+    if any(getattr(func, 'docket_table', None) == docket_table
+           for _savepoints, func in connection.run_on_commit):
+        return
+
+    def sync():
+        create_docket_sequences(docket_table, using)
+
+    sync.docket_table = docket_table
+    transaction.on_commit(sync, using=using)
+
+
+def next_docket_number(docket_type, using='default'):
+    """Allocate the next docket number of a docket type."""
+    prefix, _initial, sequence = get_docket_numbering(docket_type)
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT nextval(%s)', [sequence])
+        number = cursor.fetchone()[0]
+    return format_docket_number(prefix, number)
+
+
+def get_last_docket_number(docket_type, using='default'):
+    """
+    Get the last docket number allocated of a docket type, read from its
+    sequence without touching the docket table. Returns None if no number
+    was allocated or seeded yet.
+    """
+    prefix, _initial, sequence = get_docket_numbering(docket_type)
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT last_value, is_called FROM {0}'.format(
+                connection.ops.quote_name(sequence)
+            )
+        )
+        number, is_called = cursor.fetchone()
+    if not is_called:
+        return None
+    return format_docket_number(prefix, number)
+
+
+def reserve_docket_numbers(docket_type, count, using='default'):
+    """
+    Reserve a block of consecutive docket numbers of a docket type. The
+    numbers are taken from the sequence in one statement without locks,
+    if a concurrent allocation interleaves with them they are left as a
+    gap and the block is taken again.
+    """
+    prefix, _initial, sequence = get_docket_numbering(docket_type)
+    if count < 1:
+        return []
+    with connections[using].cursor() as cursor:
+        for _attempt in range(DOCKET_RESERVE_ATTEMPTS):
+            cursor.execute(
+                'SELECT nextval(%s) FROM generate_series(1, %s)',
+                [sequence, count]
+            )
+            numbers = sorted(row[0] for row in cursor.fetchall())
+            if numbers[-1] - numbers[0] == count - 1:
+                return [
+                    format_docket_number(prefix, number)
+                    for number in numbers
+                ]
+    raise RuntimeError(
+        'Could not reserve {0} consecutive {1} docket numbers.'.format(
+            count, docket_type
+        )
+    )
@@ -0,0 +1,713 @@
+"""freight.reports.py"""
+
+from datetime import datetime
+from threading import local
+
+from accounting.models import CustomerBilling, SupplierBilling
+from django.db.models import Prefetch
+from django.utils.translation import ugettext_lazy as _
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import (Flowable, LongTable, Paragraph,
+                                SimpleDocTemplate, Spacer, Table, TableStyle)
+
+from .models import Docket
+from .settings import DOCKET_REPORT_TABLE_CHUNK_ROWS
+
+# Number of queries used to load a docket report, or a chunk of them.
+DOCKET_REPORT_QUERIES = 5
+
+# Stylesheet of docket reports.
+STYLES = getSampleStyleSheet()
+STYLES['Normal'].fontSize = 10
+
+# Style of the tables with data.
+GRID_TABLE_STYLE = TableStyle(
+    [
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP')
+    ]
+)
+
+# Style of the comments table.
+COMMENTS_TABLE_STYLE = TableStyle(
+    [
+        ('GRID', (0, 0), (-1, -1), 0, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP')
+    ]
+)
+
+# Style of the tables used for layout.
+LAYOUT_TABLE_STYLE = TableStyle(
+    [
+        ('INNERGRID', (0, 0), (-1, -1), 0, colors.white),
+        ('BOX', (0, 0), (-1, -1), 0, colors.white),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP')
+    ]
+)
+
+# Style of the report header table.
+HEADER_TABLE_STYLE = TableStyle(
+    [
+        ('INNERGRID', (0, 0), (-1, -1), 0, colors.white),
+        ('BOX', (0, 0), (-1, -1), 0, colors.white),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+    ]
+)
+
+# Label paragraphs, built once per thread.
+_labels = local() # pylint: disable=C0103
+
+
+def get_label(text, style='Normal'):
+    """
+    Get the paragraph of a fixed text. Labels are keyed by their
+    translated text, so each language gets its own paragraphs.
+    """
+    labels = getattr(_labels, 'paragraphs', None)
+    if labels is None:
+        labels = _labels.paragraphs = {}
+    key = (str(text), style)
+    if key not in labels:
+        labels[key] = Paragraph(key[0], STYLES[style])
+    return labels[key]
+
+
+class TableChunk(Flowable):
+    """
+    Some rows of a report table, laid out on their own so the layout
+    cost per row does not grow with the table. The header is only drawn
+    on the first chunk and on chunks starting a page, so chunks continue
+    each other on a page. A chunk split between pages keeps the rows
+    that fit and leaves the rest to a new chunk.
+    """
+
+    def __init__(self, builder, rows, first=False, heights=None):
+        super().__init__()
+        self.builder = builder
+        self.rows = rows
+        self.first = first
+        self.heights = heights
+        self.tables = {}
+        self.table = None
+
+    def get_table(self, availWidth):
+        """Get the table of the chunk, with the header when needed."""
+        if self.heights is None:
+            # Lay out the rows once, the tables of the chunk reuse their
+            # heights instead of wrapping every cell again.
+            table = self.builder.build_table(self.rows)
+            table.wrap(availWidth, float('inf'))
+            self.heights = table._rowHeights # pylint: disable=W0212
+        frame = getattr(self, '_frame', None)
+        header = self.first or frame is None or bool(frame._atTop)
+        if header not in self.tables:
+            self.tables[header] = self.builder.build_table(
+                self.rows,
+                header,
+                self.heights if header else self.heights[1:]
+            )
+        return self.tables[header]
+
+    def wrap(self, availWidth, availHeight):
+        """Lay out the table of the chunk."""
+        self.table = self.get_table(availWidth)
+        self.width, self.height = self.table.wrapOn(
+            self.canv, availWidth, availHeight
+        )
+        return self.width, self.height
+
+    def draw(self):
+        """Draw the table of the chunk."""
+        self.table.drawOn(self.canv, 0, 0)
+
+    def split(self, availWidth, availHeight):
+        """Split the chunk, the rows left go to a new chunk."""
+        table = self.get_table(availWidth)
+        parts = table.splitOn(self.canv, availWidth, availHeight)
+        if not parts:
+            return []
+        # Rows of the chunk on this page, without the header.
+        count = len(parts[0]._cellvalues) - parts[0].repeatRows
+        return [parts[0], TableChunk(
+            self.builder,
+            self.rows[count:],
+            heights=self.heights[:1] + self.heights[count + 1:]
+        )]
+
+
+class TableBuilder:
+    """
+    Collect the rows of a report table and build the table once, so the
+    cost of a table is linear in its number of rows. Tables are built as
+    chunks of DOCKET_REPORT_TABLE_CHUNK_ROWS rows, ReportLab lays out
+    and splits each chunk on its own, with the header repeated on each
+    page.
+    """
+
+    def __init__(self, header, col_widths, style,
+                 chunk_rows=DOCKET_REPORT_TABLE_CHUNK_ROWS):
+        self.header = header
+        self.rows = []
+        self.col_widths = col_widths
+        self.style = style
+        self.chunk_rows = chunk_rows
+
+    def __len__(self):
+        """Number of rows without the header."""
+        return len(self.rows)
+
+    def add_row(self, row):
+        """Add a row to the table."""
+        self.rows.append(row)
+
+    def build_table(self, rows, header=True, heights=None):
+        """Build a table of some rows, with or without the header."""
+        table = LongTable(
+            [self.header] + rows if header else rows,
+            colWidths=self.col_widths,
+            rowHeights=heights,
+            hAlign='LEFT',
+            repeatRows=1 if header else 0,
+        )
+        table.setStyle(self.style)
+        return table
+
+    def build(self):
+        """Build the chunks of the table with all the collected rows."""
+        return [
+            TableChunk(
+                self,
+                self.rows[start:start + self.chunk_rows],
+                first=start == 0
+            )
+            for start in range(0, len(self.rows), self.chunk_rows)
+        ]
+
+
+class DocketReport:
+    """Docket PDF report."""
+
+    def __init__(self, docket, cargos=(), supplier_billings=(),
+                 customer_billings=(), payments=()):
+        self.docket = docket
+        self.cargos = cargos
+        self.supplier_billings = supplier_billings
+        self.customer_billings = customer_billings
+        self.payments = payments
+
+    @staticmethod
+    def paragraph(text, style='Normal'):
+        """Get a paragraph of text."""
+        return Paragraph(text, STYLES[style])
+
+    @staticmethod
+    def label(text, style='Normal'):
+        """Get the paragraph of a fixed text."""
+        return get_label(text, style)
+
+    def date_table(self, date):
+        """Get a date cell."""
+        if date is None:
+            return ''
+        return self.paragraph(str(date))
+
+    def bool_table(self, boolean):
+        """Get a boolean cell."""
+        if boolean:
+            return self.label('Yes')
+        return self.label('No')
+
+    def string_table(self, string):
+        """Get a string cell."""
+        if string is None:
+            return self.label('')
+        return self.paragraph(str(string))
+
+    def get_filename(self):
+        """Get the report filename."""
+        return str(_('Docket')) + ' ' + str(_('Report')) + ' - ' \
+            + str(self.docket.docket_number_id) + '.pdf'
+
+    def get_header_table(self):
+        """Get the report header."""
+        header_title = self.paragraph(
+            str(_('Docket')) + ' ' + str(_('Report')) + ' - ' \
+            + str(self.docket.docket_number_id),
+            'Heading1'
+        )
+        report_info = str(_(
+            'Report Date:'
+            )) + ' ' + str(
+            datetime.now().strftime("%x %X")
+            )
+        header_table = Table(
+            [[header_title, self.paragraph(report_info)]],
+            colWidths=(19.8*cm, 5.8*cm),
+            hAlign='LEFT'
+        )
+        header_table.setStyle(HEADER_TABLE_STYLE)
+        return header_table
+
+    def get_address(self, prefix):
+        """Get the origin or destination address on a single line."""
+        fields = [
+            'address_line1',
+            'address_line2',
+            'city_district',
+            'state_province',
+            'country',
+            'postal_code'
+        ]
+        values = [
+            getattr(self.docket, prefix + '_' + field) for field in fields
+        ]
+        return ', '.join(str(value) for value in values if value is not None)
+
+    def get_top_row_table(self):
+        """Get the docket information and addresses."""
+        obj = self.docket
+        shipper = obj.shipper()
+        consignee = obj.consignee()
+        origin_destination = [
+            [self.label(_('Origin')),
+                self.paragraph(self.get_address('origin'))],
+            [self.label(_('Destination')),
+                self.paragraph(self.get_address('destination'))]
+        ]
+        origin_destination_table = Table(
+            origin_destination,
+            colWidths=(4*cm, 6.5*cm),
+            minRowHeights=(1.8*cm, 1.8*cm),
+            hAlign='LEFT'
+        )
+        origin_destination_table.setStyle(GRID_TABLE_STYLE)
+
+        docket_information = [
+            [self.label(_('Docket #')),
+                self.paragraph(str(obj.docket_number_id)),
+                self.label(_('Ready To Invoice')),
+                self.bool_table(obj.ready_to_invoice)],
+
+            [self.label(_('Type of Docket')),
+                self.paragraph(str(obj.docket_type)),
+                self.label(_('Shipment Delivered')),
+                self.bool_table(obj.shipment_delivered)],
+
+            [self.label(_('Consignee')), self.string_table(consignee),
+                self.label(_('Invoice Completed')),
+                self.bool_table(obj.invoice_completed)],
+
+            [self.label(_('Shipper')), self.string_table(shipper),
+                self.label(_('Docket Completed')),
+                self.bool_table(obj.docket_completed)],
+
+            [self.label(_('ID')),
+                self.paragraph(str(obj.id)),
+                self.label(_('In Dispute')),
+                self.bool_table(obj.in_dispute)],
+
+        ]
+        docket_information_table = Table(
+            docket_information,
+            colWidths=(4*cm, 5*cm, 4*cm, 1.2*cm),
+            hAlign='LEFT',
+        )
+        docket_information_table.setStyle(GRID_TABLE_STYLE)
+
+        top_row_table = Table(
+            [[docket_information_table, origin_destination_table]],
+            hAlign='LEFT',
+            longTableOptimize=True,
+        )
+        top_row_table.setStyle(LAYOUT_TABLE_STYLE)
+        return top_row_table
+
+    def get_shipment_information_table(self):
+        """Get the shipment information."""
+        obj = self.docket
+        shipment_information_a = [
+            [self.label(_('PO #')),
+                self.string_table(obj.po_number)],
+
+            [self.label(_('PRO #')),
+                self.string_table(obj.pro_number)],
+
+            [self.label(_('BOL #')),
+                self.string_table(obj.bol_number)],
+
+            [self.label(_('Pickup #')),
+                self.string_table(obj.pickup_number)],
+
+            [self.label(_('CC #')),
+                self.string_table(obj.cc_number)],
+
+            [self.label(_('AWB #')),
+                self.string_table(obj.awb_number)],
+
+            [self.label(_('BL #')),
+                self.string_table(obj.bl_number)],
+
+            [self.label(_('HBL #')),
+                self.string_table(obj.hbl_number)],
+
+            [self.label(_('CNTR #')),
+                self.string_table(obj.cntr_number)],
+
+            [self.label(_('Entry #')),
+                self.string_table(obj.entry_number)],
+
+            [self.label(_('Carrier')),
+                self.string_table(obj.carrier)],
+
+        ]
+        shipment_information_a_table = Table(
+            shipment_information_a,
+            colWidths=(2.3*cm, 7.2*cm),
+            hAlign='LEFT',
+        )
+        shipment_information_a_table.setStyle(GRID_TABLE_STYLE)
+        shipment_information_b = [
+            [self.label(_('Inbond')),
+                self.bool_table(obj.inbond),
+                self.label(_('Est. Time of Delivery')),
+                self.date_table(obj.etd)],
+
+            [self.label(_('Hazardous Cargo')),
+                self.bool_table(obj.hazardous_cargo),
+                self.label(_('Est. Time of Arrival #1')),
+                self.date_table(obj.eta_1)],
+
+            [self.label(_('Skids Exchange')),
+                self.bool_table(obj.skids_exchange),
+                self.label(_('Est. Time of Arrival #2')),
+                self.date_table(obj.eta_2)],
+
+            [self.label(_('OBL To Shipping Line Sent')),
+                self.bool_table(obj.obl_to_shipping_line_sent),
+                self.label(_('OBL To Shipping Line Sent DT')),
+                self.date_table(obj.obl_to_shipping_line_sent_date)],
+
+            [self.label(_('Documents To Broker Sent')),
+                self.bool_table(obj.documents_to_broker_sent),
+                self.label(_('Documents To Broker Sent DT')),
+                self.date_table(obj.documents_to_broker_sent_date)],
+
+            [self.label(_('Documents To Carrier Sent')),
+                self.bool_table(obj.documents_to_carrier_sent),
+                self.label(_('Documents To Carrier Sent DT')),
+                self.date_table(obj.documents_to_carrier_sent_date)],
+
+            [self.label(_('Arrival Notice Received')),
+                self.bool_table(obj.arrival_notice_received),
+                self.label(_('Arrival Notice Received DT')),
+                self.date_table(obj.arrival_notice_received_date)],
+
+            [self.label(_('ISF Filled')),
+                self.bool_table(obj.isf_filled),
+                self.label(_('ISF Filled DT')),
+                self.date_table(obj.isf_filled_date)],
+
+            [self.label(_('Storage Start DT')),
+                self.date_table(obj.storage_start_date),
+                self.label(_('Release DT')),
+                self.date_table(obj.release_date)],
+
+        ]
+        shipment_information_b_table = Table(
+            shipment_information_b,
+            colWidths=(
+                5*cm,
+                2.4*cm,
+                5.5*cm,
+                2.4*cm
+            ),
+            hAlign='LEFT',
+        )
+        shipment_information_b_table.setStyle(GRID_TABLE_STYLE)
+        shipment_information_c_table = Table(
+            [[shipment_information_a_table, shipment_information_b_table]],
+            hAlign='LEFT',
+        )
+        shipment_information_c_table.setStyle(LAYOUT_TABLE_STYLE)
+        return shipment_information_c_table
+
+    def get_cargo_table(self):
+        """Get the cargo table builder."""
+        cargo = TableBuilder(
+            [
+                self.label(_('Description')),
+                self.label(_('Quantity')),
+                self.label(_('Piece Unit')),
+                self.label(_('Weight')),
+                self.label(_('Unit')),
+                self.label(_('Length')),
+                self.label(_('Width')),
+                self.label(_('Height')),
+                self.label(_('Unit'))
+            ],
+            (
+                11*cm, 2*cm, 2.2*cm, 2*cm,
+                1.2*cm, 2*cm, 2*cm, 2*cm, 1.2*cm
+            ),
+            GRID_TABLE_STYLE
+        )
+        for i in self.cargos:
+            cargo.add_row(
+                [
+                    self.string_table(i.description),
+                    self.string_table(i.quantity),
+                    self.string_table(i.piece_unit),
+                    self.string_table(i.weight),
+                    self.string_table(i.weight_unit),
+                    self.string_table(i.length),
+                    self.string_table(i.width),
+                    self.string_table(i.height),
+                    self.string_table(i.dimension_unit)
+                ]
+            )
+        return cargo
+
+    def get_supplier_billing_table(self):
+        """Get the supplier billing table builder."""
+        supplier_billing = TableBuilder(
+            [
+                self.label(_('BT No. #')),
+                self.label(_('Supplier')),
+                self.label(_('Supplier Service')),
+                self.label(_('CCY')),
+                self.label(_('PX')),
+                self.label(_('XR')),
+                self.label(_('Bill No. #')),
+                self.label(_('RCV')),
+                self.label(_('APV')),
+                self.label(_('REC')),
+                self.label(_('Paid')),
+                self.label(_('Dis.')),
+                self.label(_('PY. Date')),
+                self.label(_('PY. Type')),
+                self.label(_('PY. TN.'))
+            ],
+            (
+                1*cm, 2.4*cm, 2.6*cm, 1.6*cm, 1.6*cm,
+                1.6*cm, 2*cm, 1.2*cm, 1.2*cm, 1.2*cm,
+                1.2*cm, 1.2*cm, 2.4*cm, 2.4*cm, 2*cm
+            ),
+            GRID_TABLE_STYLE
+        )
+        for i in self.supplier_billings:
+            supplier_billing.add_row(
+                [
+                    self.string_table(i.bill_to),
+                    self.string_table(i.supplier),
+                    self.string_table(i.supplier_service),
+                    self.string_table(i.currency),
+                    self.string_table(i.price),
+                    self.string_table(i.exchange_rate),
+                    self.string_table(i.bill_no),
+                    self.bool_table(i.bill_received),
+                    self.bool_table(i.bill_approved),
+                    self.bool_table(i.bill_recorded),
+                    self.bool_table(i.bill_paid),
+                    self.bool_table(i.bill_dispute),
+                    self.date_table(i.payment_date),
+                    self.string_table(i.payment_type),
+                    self.string_table(i.payment_transfer_number)
+                ]
+            )
+        return supplier_billing
+
+    def get_customer_billing_table(self):
+        """Get the customer billing table builder."""
+        customer_billing = TableBuilder(
+            [
+                self.label(_('BT No. #')),
+                self.label(_('Customer Company')),
+                self.label(_('Customer Individual')),
+                self.label(_('Customer Service')),
+                self.label(_('CCY')),
+                self.label(_('PX')),
+                self.label(_('XR')),
+                self.label(_('Invoice No. #'))
+            ],
+            (
+                1.9*cm, 4*cm, 4*cm, 4.4*cm,
+                1.2*cm, 2.5*cm, 2*cm, 5.6*cm
+            ),
+            GRID_TABLE_STYLE
+        )
+        for i in self.customer_billings:
+            customer_billing.add_row(
+                [
+                    self.string_table(i.bill_to),
+                    self.string_table(i.customer_company),
+                    self.string_table(i.customer_individual),
+                    self.string_table(i.customer_service),
+                    self.string_table(i.currency),
+                    self.string_table(i.price),
+                    self.string_table(i.exchange_rate),
+                    self.string_table(i.invoice_no)
+                ]
+            )
+        return customer_billing
+
+    def get_payment_table(self):
+        """Get the payment table builder."""
+        payment = TableBuilder(
+            [
+                self.label(_('Invoice #')),
+                self.label(_('INV BAK Sent')),
+                self.label(_('INV BAK Sent Date')),
+                self.label(_('P Type')),
+                self.label(_('P Transfer Number'))
+            ],
+            (5.9*cm, 4.6*cm, 4.6*cm, 4.6*cm, 5.9*cm),
+            GRID_TABLE_STYLE
+        )
+        for i in self.payments:
+            payment.add_row(
+                [
+                    self.string_table(i.invoice_no),
+                    self.string_table(i.invoice_backup_sent),
+                    self.date_table(i.invoice_backup_sent_date),
+                    self.string_table(i.payment_type),
+                    self.string_table(i.payment_transfer_number),
+                ]
+            )
+        return payment
+
+    def get_comments_table(self):
+        """Get the comments and notes, if any."""
+        obj = self.docket
+        if not any([obj.dispute_notes, obj.note, obj.shipment_notes,
+                    obj.customer_notes]):
+            return None
+        # One note per row, so long notes can split between pages.
+        comments = [
+            [self.label('Dispute Notes'),
+                self.string_table(obj.dispute_notes)],
+            [self.label('Shipment Notes'),
+                self.string_table(obj.shipment_notes)],
+            [self.label('Comments'),
+                self.string_table(obj.note)],
+            [self.label('Customer Notes'),
+                self.string_table(obj.customer_notes)],
+        ]
+        comments_table = Table(
+            comments,
+            colWidths=(3*cm, 22*cm),
+            hAlign='LEFT'
+        )
+        comments_table.setStyle(COMMENTS_TABLE_STYLE)
+        return comments_table
+
+    def get_content(self):
+        """Get the document structure."""
+        content = [
+            self.get_header_table(),
+            Spacer(width=0, height=0.5*cm),
+            self.get_top_row_table(),
+            Spacer(width=0, height=0.5*cm),
+            self.label(_('Shipment Information'), 'Heading2'),
+            Spacer(width=0, height=0.5*cm),
+            self.get_shipment_information_table(),
+            Spacer(width=0, height=3*cm),
+        ]
+
+        sections = [
+            (_('Cargos'), self.get_cargo_table()),
+            (_('Supplier Billings'), self.get_supplier_billing_table()),
+            (_('Customer Billings'), self.get_customer_billing_table()),
+            (_('Payments'), self.get_payment_table()),
+        ]
+        for title, table in sections:
+            # Skip sections without rows.
+            if not table:
+                continue
+            content.append(self.label(title, 'Heading2'))
+            content.append(Spacer(width=0, height=0.5*cm))
+            content.extend(table.build())
+            content.append(Spacer(width=0, height=0.5*cm))
+
+        comments_table = self.get_comments_table()
+        if comments_table is not None:
+            content.append(self.label('Coments and Notes', 'Heading1'))
+            content.append(Spacer(width=0, height=0.5*cm))
+            content.append(comments_table)
+        return content
+
+    def build(self, output):
+        """Build the report into a file-like output."""
+        get_doc_template(output).build(self.get_content())
+
+
+def get_doc_template(output):
+    """Get the document template of docket reports."""
+    return SimpleDocTemplate(
+        output,
+        pagesize=landscape(letter),
+        rightMargin=1*cm,
+        leftMargin=1*cm,
+        topMargin=1*cm,
+        bottomMargin=1*cm,
+    )
+
+
+def get_docket_report_queryset():
+    """
+    Get a docket queryset loading the parties, cargos, billings and
+    payments of the report in DOCKET_REPORT_QUERIES queries.
+    """
+    return Docket.objects.select_related(
+        'shipper_individual',
+        'shipper_company',
+        'consignee_individual',
+        'consignee_company',
+        'carrier'
+    ).prefetch_related(
+        'cargo_set',
+        Prefetch(
+            'supplierbilling_set',
+            queryset=SupplierBilling.objects.select_related('supplier')
+        ),
+        Prefetch(
+            'customerbilling_set',
+            queryset=CustomerBilling.objects.select_related(
+                'customer_company',
+                'customer_individual'
+            )
+        ),
+        'payment_set'
+    )
+
+
+def get_docket_report(docket):
+    """Get the report of a docket loaded by get_docket_report_queryset."""
+    return DocketReport(
+        docket,
+        cargos=list(docket.cargo_set.all()),
+        supplier_billings=list(docket.supplierbilling_set.all()),
+        customer_billings=list(docket.customerbilling_set.all()),
+        payments=list(docket.payment_set.all()),
+    )
+
+
+def load_docket_report(pk):
+    """Load the report of a docket."""
+    return get_docket_report(get_docket_report_queryset().get(id=pk))
+
+
+def iter_docket_reports(queryset, chunk_size=50):
+    """
+    Iterate the reports of the dockets of a queryset, loading them by
+    chunks so memory does not grow with the number of dockets.
+    """
+    pks = list(queryset.values_list('pk', flat=True))
+    for start in range(0, len(pks), chunk_size):
+        dockets = get_docket_report_queryset().filter(
+            pk__in=pks[start:start + chunk_size]
+        )
+        for docket in dockets:
+            yield get_docket_report(docket)
@@ -0,0 +1,128 @@
+"""freight.search.py"""
+
+import re
+from functools import reduce
+from operator import add, or_
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.constants import LOOKUP_SEP
+
+from .settings import DOCKET_SEARCH_CONFIG
+
+# Docket fields of the search vector by weight.
+DOCKET_SEARCH_FIELDS = {
+    'A': (
+        'docket_number_id',
+        'reference_number',
+        'po_number',
+        'pro_number',
+        'bol_number',
+        'pickup_number',
+        'cc_number',
+        'awb_number',
+        'bl_number',
+        'hbl_number',
+        'cntr_number',
+        'entry_number',
+    ),
+    'B': (
+        'shipper_individual__first_name',
+        'shipper_individual__last_name',
+        'shipper_company__company_name',
+        'consignee_individual__first_name',
+        'consignee_individual__last_name',
+        'consignee_company__company_name',
+        'carrier__company_name',
+    ),
+    'C': (
+        'note',
+        'tracking_notes',
+        'shipment_notes',
+        'customer_notes',
+        'dispute_notes',
+    ),
+}
+
+
+def get_docket_search_vector():
+    """Get the expression of the docket search vector."""
+    return reduce(add, (
+        SearchVector(*fields, weight=weight, config=DOCKET_SEARCH_CONFIG)
+        for weight, fields in DOCKET_SEARCH_FIELDS.items()
+    ))
+
+
+def get_docket_search_query(text):
+    """
+    Get a prefix search query matching all words of a text, or None if
+    the text has no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(word + ':*' for word in words),
+        config=DOCKET_SEARCH_CONFIG,
+        search_type='raw'
+    )
+
+
+def get_party_search_fields(docket_model, party_model):
+    """
+    Get the docket foreign keys to a party model and the party fields
+    of the docket search vector.
+    """
+    relations = set()
+    fields = set()
+    for weight_fields in DOCKET_SEARCH_FIELDS.values():
+        for field_name in weight_fields:
+            relation, _sep, field = field_name.partition(LOOKUP_SEP)
+            if field and \
+                    docket_model._meta.get_field(relation).related_model \
+                    is party_model:
+                relations.add(relation)
+                fields.add(field)
+    return sorted(relations), sorted(fields)
+
+
+def update_docket_search_vectors(queryset):
+    """
+    Update the search vector of the dockets of a queryset in a single
+    query, returns the number of dockets updated.
+    """
+    vector = queryset.model._default_manager.filter(
+        pk=OuterRef('pk')
+    ).annotate(
+        search=get_docket_search_vector()
+    ).values('search')[:1]
+    return queryset.update(search_vector=Subquery(vector))
+
+
+def update_party_docket_search_vectors(docket_model, party):
+    """Update the search vector of the dockets of a party."""
+    relations = get_party_search_fields(docket_model, type(party))[0]
+    if not relations:
+        return 0
+    return update_docket_search_vectors(
+        docket_model._default_manager.filter(reduce(or_, (
+            Q(**{relation: party}) for relation in relations
+        )))
+    )
+
+
+def search_dockets(queryset, text):
+    """
+    Filter a docket queryset by a search text, ranked by relevance in
+    the search_rank annotation.
+    """
+    query = get_docket_search_query(text)
+    if query is None:
+        # Keep the annotation so callers can still select and order by it.
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-created_at')
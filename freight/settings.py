@@ -1,5 +1,8 @@
 """freight.settings.py"""
 
+import os
+from tempfile import gettempdir
+
 # Docket number prefix.
 DOCKET_IMPORT_PREFIX = 'UI'
 DOCKET_EXPORT_PREFIX = 'UE'
@@ -7,3 +10,38 @@ DOCKET_EXPORT_PREFIX = 'UE'
 # Initial docket number,
 DOCKET_IMPORT_INITIAL = 129
 DOCKET_EXPORT_INITIAL = 129
+
+# Database sequences used to allocate docket numbers.
+DOCKET_IMPORT_SEQUENCE = 'freight_docket_import_number_seq'
+DOCKET_EXPORT_SEQUENCE = 'freight_docket_export_number_seq'
+
+# Attempts to reserve a block of consecutive docket numbers.
+DOCKET_RESERVE_ATTEMPTS = 5
+
+# Seconds a rendered docket report is kept on cache.
+DOCKET_REPORT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Render docket reports on a background process pool.
+DOCKET_REPORT_ASYNC = False
+
+# Number of processes rendering docket reports.
+DOCKET_REPORT_WORKERS = 2
+
+# Seconds a docket report job status is kept.
+DOCKET_REPORT_JOB_TIMEOUT = 60 * 10
+
+# Directory of the rendered docket reports.
+DOCKET_REPORT_DIR = os.path.join(gettempdir(), 'freight_docket_reports')
+
+# Bytes of a rendered docket report read at once when streamed.
+DOCKET_REPORT_CHUNK_SIZE = 64 * 1024
+
+# Rows of each chunk of a docket report table, laid out on its own.
+DOCKET_REPORT_TABLE_CHUNK_ROWS = 40
+
+# Text search configuration of the docket search vector.
+DOCKET_SEARCH_CONFIG = 'simple'
+
+# Dockets returned by the docket search view, and its maximum.
+DOCKET_SEARCH_LIMIT = 20
+DOCKET_SEARCH_MAX_LIMIT = 100
@@ -0,0 +1,114 @@
+"""freight.signals.py"""
+
+from accounting.models import CustomerBilling, Payment, SupplierBilling
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from thirdparty.dedupe import parties_merged
+from thirdparty.models import Company, Individual
+
+from .cache import delete_cached_docket_report
+from .models import Cargo, Docket
+from .numbering import create_docket_sequences, sync_docket_sequences
+from .search import (get_party_search_fields, update_docket_search_vectors,
+                     update_party_docket_search_vectors)
+
+
+def setup_docket_numbering(sender, using, apps=None, **kwargs): # pylint: disable=W0613
+    """Create and seed the docket number sequences after migrate."""
+    try:
+        docket = apps.get_model('freight', 'Docket')
+    except LookupError:
+        return
+    if docket._meta.db_table in connections[using].introspection.table_names():
+        create_docket_sequences(docket._meta.db_table, using)
+
+
+@receiver(post_save, sender=Docket)
+def sync_loaded_docket_numbers(sender, raw, using, **kwargs): # pylint: disable=W0613
+    """
+    Resync the docket number sequences after dockets are loaded as they
+    are, by loaddata or a fixture import, with their own numbers.
+    """
+    if raw:
+        sync_docket_sequences(sender._meta.db_table, using)
+
+
+@receiver(post_save, sender=Docket)
+@receiver(post_delete, sender=Docket)
+def delete_docket_report(sender, instance, **kwargs): # pylint: disable=W0613
+    """Delete the cached report of a changed docket."""
+    delete_cached_docket_report(instance.pk)
+
+
+@receiver(post_save, sender=Cargo)
+@receiver(post_delete, sender=Cargo)
+@receiver(post_save, sender=SupplierBilling)
+@receiver(post_delete, sender=SupplierBilling)
+@receiver(post_save, sender=CustomerBilling)
+@receiver(post_delete, sender=CustomerBilling)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def delete_docket_row_report(sender, instance, **kwargs): # pylint: disable=W0613
+    """Delete the cached report of the docket of a changed row."""
+    delete_cached_docket_report(instance.docket_id)
+
+
+@receiver(post_delete, sender=Cargo)
+@receiver(post_delete, sender=SupplierBilling)
+@receiver(post_delete, sender=CustomerBilling)
+@receiver(post_delete, sender=Payment)
+def touch_docket(sender, instance, using, **kwargs): # pylint: disable=W0613
+    """
+    Update the docket of a deleted row once the transaction is committed,
+    so the report version built from the latest update of its rows
+    changes. Rows deleted together update their dockets at once, and a
+    docket deleted with its rows is no longer there to update.
+    """
+    connection = connections[using]
+    for _savepoints, func in connection.run_on_commit:
+        docket_ids = getattr(func, 'docket_ids', None)
+        if docket_ids is not None:
+            docket_ids.add(instance.docket_id)
+            return
+
+    def touch():
+        Docket.objects.using(using).filter(pk__in=touch.docket_ids).update(
+            updated_at=timezone.now()
+        )
+
+    touch.docket_ids = {instance.docket_id}
+    transaction.on_commit(touch, using=using)
+
+
+@receiver(post_save, sender=Docket)
+def update_docket_search_vector(sender, instance, **kwargs): # pylint: disable=W0613
+    """Update the search vector of a saved docket."""
+    update_docket_search_vectors(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=Individual)
+def check_party_search_fields(sender, instance, **kwargs): # pylint: disable=W0613
+    """Check if the docket search fields of a party are changed."""
+    fields = get_party_search_fields(Docket, sender)[1]
+    instance._docket_search_changed = not sender._default_manager.filter( # pylint: disable=W0212
+        pk=instance.pk,
+        **{field: getattr(instance, field) for field in fields}
+    ).exists()
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Individual)
+def update_party_search_vectors(sender, instance, created, **kwargs): # pylint: disable=W0613
+    """Update the search vector of the dockets of a renamed party."""
+    if not created and getattr(instance, '_docket_search_changed', True):
+        update_party_docket_search_vectors(Docket, instance)
+
+
+@receiver(parties_merged, sender=Company)
+@receiver(parties_merged, sender=Individual)
+def update_merged_party_search_vectors(sender, target, **kwargs): # pylint: disable=W0613
+    """Update the search vector of the dockets of a merged party."""
+    update_party_docket_search_vectors(Docket, target)
@@ -0,0 +1,310 @@
+"""freight.tests.py"""
+
+import os
+import re
+import tracemalloc
+from decimal import Decimal
+
+from accounting.models import CustomerBilling, Payment, SupplierBilling
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import FileResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from netexgl.db import explain_queryset
+from thirdparty.models import Company, Individual
+
+from .cache import delete_cached_docket_report
+from .management.commands.benchmark_docket_print import get_synthetic_report
+from .management.commands.check_docket_query_plans import (
+    get_docket_querysets, get_missing_indexes, get_seq_scans)
+from .models import Cargo, Docket
+from .reports import DOCKET_REPORT_QUERIES, load_docket_report
+from .workers import render_docket_report
+
+# Caches of the tests, the default one needs a Redis server.
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cargo lines of a report of at least 50 pages.
+LONG_REPORT_CARGO_LINES = 1500
+
+# Most memory allocated to render a report of at least 50 pages.
+LONG_REPORT_MEMORY_LIMIT = 48 * 1024 * 1024
+
+
+def create_docket(rows=0, **kwargs):
+    """Create a docket with its parties and some rows of each kind."""
+    fields = {
+        'docket_type': 'Import',
+        'shipper_company': Company.objects.create(
+            company_name='Shipper Company'
+        ),
+        'consignee_individual': Individual.objects.create(
+            first_name='Consignee', last_name='Individual'
+        ),
+        'carrier': Company.objects.create(company_name='Carrier Company'),
+        'origin_address_line1': '1 Origin Street',
+        'origin_city_district': 'Toronto',
+        'origin_state_province': 'Ontario',
+        'origin_postal_code': 'M5V 2T6',
+        'origin_country': 'Canada',
+        'destination_address_line1': '1 Destination Street',
+        'destination_city_district': 'Miami',
+        'destination_state_province': 'Florida',
+        'destination_postal_code': '33101',
+        'destination_country': 'United States of America',
+    }
+    fields.update(kwargs)
+    docket = Docket.objects.create(**fields)
+    if rows:
+        supplier = Company.objects.create(company_name='Supplier Company')
+        customer = Individual.objects.create(
+            first_name='Customer', last_name='Individual'
+        )
+        Cargo.objects.bulk_create(
+            Cargo(
+                docket=docket,
+                description='Cargo line {0}'.format(i),
+                quantity=i + 1,
+                piece_unit='Box',
+                weight=10.5
+            )
+            for i in range(rows)
+        )
+        SupplierBilling.objects.bulk_create(
+            SupplierBilling(
+                docket=docket,
+                bill_to='1',
+                supplier=supplier,
+                supplier_service='Freight',
+                price=Decimal('100.00'),
+                currency='USD'
+            )
+            for _i in range(rows)
+        )
+        CustomerBilling.objects.bulk_create(
+            CustomerBilling(
+                docket=docket,
+                bill_to='1',
+                customer_individual=customer,
+                customer_service='Freight',
+                price=Decimal('150.00'),
+                currency='USD'
+            )
+            for _i in range(rows)
+        )
+        Payment.objects.bulk_create(
+            Payment(docket=docket, invoice_no='I-{0}'.format(i))
+            for i in range(rows)
+        )
+    return docket
+
+
+class DocketSearchViewTests(TestCase):
+    """Test the docket search view."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_empty_query(self):
+        """An empty query returns no results."""
+        response = self.client.get(reverse('docket_search'), {'q': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': []})
+
+    def test_punctuation_query(self):
+        """A query without words returns no results."""
+        response = self.client.get(reverse('docket_search'), {'q': '--'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': []})
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DocketReportQueryTests(TestCase):
+    """Test the queries of the docket report loader and print view."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_docket(self, rows=0):
+        """Create a docket, removing its report files afterwards."""
+        docket = create_docket(rows)
+        self.addCleanup(delete_cached_docket_report, docket.pk)
+        return docket
+
+    def test_load_queries(self):
+        """A report is loaded in the same queries whatever its rows."""
+        for rows in (0, 1, 20):
+            docket = self.create_docket(rows)
+            with self.assertNumQueries(DOCKET_REPORT_QUERIES):
+                report = load_docket_report(docket.pk)
+            # Parties and rows are all loaded.
+            with self.assertNumQueries(0):
+                report.get_content()
+
+    def test_print_queries(self):
+        """The print view queries do not grow with the report rows."""
+        self.client.get(
+            reverse('docket_print', args=[str(self.create_docket().pk)])
+        )
+        small = reverse('docket_print', args=[str(self.create_docket(1).pk)])
+        large = reverse('docket_print', args=[str(self.create_docket(20).pk)])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(small)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(large)
+        self.assertEqual(response.status_code, 200)
+        # A cached report is not loaded again.
+        with self.assertNumQueries(len(queries) - DOCKET_REPORT_QUERIES):
+            response = self.client.get(large)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DocketChangeListTests(TestCase):
+    """Test the docket changelist."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_dockets(self, count):
+        """Create dockets with every kind of shipper and consignee."""
+        for i in range(count):
+            if i % 2:
+                create_docket(
+                    shipper_company=None,
+                    shipper_individual=Individual.objects.create(
+                        first_name='Shipper', last_name=str(i)
+                    ),
+                    consignee_individual=None,
+                    consignee_company=Company.objects.create(
+                        company_name='Consignee {0}'.format(i)
+                    )
+                )
+            else:
+                create_docket()
+
+    def test_changelist_queries(self):
+        """The changelist queries do not grow with the rows of a page."""
+        url = reverse('admin:freight_docket_changelist')
+        self.create_dockets(2)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.create_dockets(20)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 22)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DocketQueryPlanTests(TestCase):
+    """Test the query plans of the common docket queries."""
+
+    def setUp(self):
+        cache.clear()
+        create_docket(1)
+        with connection.cursor() as cursor:
+            # Sequential scans are left only where no index applies,
+            # whatever the size of the tables.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_query_plans(self):
+        """
+        Filters, keyset pages and searches use their partial, keyset,
+        date, trigram and full-text indexes.
+        """
+        for name, queryset, indexes in get_docket_querysets('acme'):
+            with self.subTest(name):
+                plan = explain_queryset(queryset)
+                self.assertEqual(get_seq_scans(plan), [])
+                self.assertEqual(get_missing_indexes(plan, indexes), [])
+
+
+class DocketReportMemoryTests(SimpleTestCase):
+    """Test the memory used to render docket reports."""
+
+    def test_long_report_memory(self):
+        """A 50 page report is rendered to a file in bounded memory."""
+        report = get_synthetic_report({'cargo': LONG_REPORT_CARGO_LINES})
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            path = render_docket_report(report, 'en')[1]
+            peak = tracemalloc.get_traced_memory()[1] - start
+        finally:
+            tracemalloc.stop()
+        self.addCleanup(os.unlink, path)
+        with open(path, 'rb') as output:
+            pages = re.findall(rb'/Type /Page\b(?!s)', output.read())
+        self.assertGreaterEqual(len(pages), 50)
+        self.assertLess(peak, LONG_REPORT_MEMORY_LIMIT)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DocketPrintViewTests(TestCase):
+    """Test the docket print view."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_print_streams_file(self):
+        """Reports are streamed from their file, cached or not."""
+        docket = create_docket(20)
+        self.addCleanup(delete_cached_docket_report, docket.pk)
+        url = reverse('docket_print', args=[str(docket.pk)])
+        for _request in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response, FileResponse)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            content = b''.join(response.streaming_content)
+            response.close()
+            self.assertTrue(content.startswith(b'%PDF'))
+            self.assertEqual(int(response['Content-Length']), len(content))
+
+    def test_print_not_modified(self):
+        """An unchanged report is answered with 304 without rendering."""
+        docket = create_docket(1)
+        self.addCleanup(delete_cached_docket_report, docket.pk)
+        url = reverse('docket_print', args=[str(docket.pk)])
+        response = self.client.get(url)
+        response.close()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
@@ -3,12 +3,22 @@
 from django.urls import path
 from django.utils.translation import gettext_lazy as _
 
-from .views import DocketPrintView
+from .views import DocketPrintStatusView, DocketPrintView, DocketSearchView
 
 urlpatterns = [
     path(
         _('docket/print/<uuid:pk>'),
         DocketPrintView.as_view(),
         name='docket_print'
+    ),
+    path(
+        _('docket/print/<uuid:pk>/status'),
+        DocketPrintStatusView.as_view(),
+        name='docket_print_status'
+    ),
+    path(
+        _('docket/search'),
+        DocketSearchView.as_view(),
+        name='docket_search'
     )
 ]
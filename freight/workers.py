@@ -0,0 +1,176 @@
+"""freight.workers.py"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from zipfile import ZIP_STORED, ZipFile
+
+import django
+from django.core.cache import cache
+from django.utils import translation
+
+from .cache import (get_cached_docket_report, get_docket_report_path,
+                    get_docket_report_version, set_cached_docket_report)
+from .reports import iter_docket_reports, load_docket_report
+from .settings import (DOCKET_REPORT_CHUNK_SIZE, DOCKET_REPORT_DIR,
+                       DOCKET_REPORT_JOB_TIMEOUT, DOCKET_REPORT_WORKERS)
+
+# Docket report job status.
+JOB_PENDING = 'pending'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+_executor = None # pylint: disable=C0103
+_executor_lock = Lock()
+
+
+def get_executor():
+    """Get the process pool rendering docket reports."""
+    global _executor # pylint: disable=W0603,C0103
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=DOCKET_REPORT_WORKERS,
+                initializer=django.setup
+            )
+        return _executor
+
+
+def render_docket_report(report, language=None, path=None):
+    """
+    Render a docket report into a file, returns its filename and path.
+    The report is written to a temporary file on DOCKET_REPORT_DIR and
+    moved to the path once done, so a partial report is never read.
+    Without a path the temporary file is kept and returned.
+    """
+    os.makedirs(DOCKET_REPORT_DIR, exist_ok=True)
+    with NamedTemporaryFile(
+            dir=DOCKET_REPORT_DIR, suffix='.pdf', delete=False) as output:
+        try:
+            with translation.override(language):
+                report.build(output)
+        except BaseException:
+            os.unlink(output.name)
+            raise
+    if path is None:
+        return report.get_filename(), output.name
+    os.replace(output.name, path)
+    return report.get_filename(), path
+
+
+def get_job_key(pk, etag, language):
+    """Get the cache key of a docket report job."""
+    return 'freight:docket_report_job:{0}:{1}:{2}'.format(
+        pk, etag.strip('"'), language
+    )
+
+
+def store_docket_report(pk, etag, language, job_key, future):
+    """Cache a docket report rendered on the process pool."""
+    try:
+        filename, path = future.result()
+    except Exception: # pylint: disable=W0703
+        cache.set(job_key, JOB_FAILED, DOCKET_REPORT_JOB_TIMEOUT)
+        return
+    set_cached_docket_report(pk, etag, filename, path, language)
+    cache.delete(job_key)
+
+
+def submit_docket_report(pk):
+    """
+    Queue the render of a docket report on the process pool, returns the
+    job status or None if the docket does not exist. The same report is
+    queued only once while its job is pending, on any web process.
+    """
+    version = get_docket_report_version(pk)
+    if version is None:
+        return None
+    etag = version[1]
+    language = translation.get_language()
+    if get_cached_docket_report(pk, etag) is not None:
+        return JOB_DONE
+    job_key = get_job_key(pk, etag, language)
+    if not cache.add(job_key, JOB_PENDING, DOCKET_REPORT_JOB_TIMEOUT):
+        return cache.get(job_key, JOB_PENDING)
+    # Data is loaded here, workers only render it.
+    report = load_docket_report(pk)
+    future = get_executor().submit(
+        render_docket_report,
+        report,
+        language,
+        get_docket_report_path(pk, etag, language)
+    )
+    future.add_done_callback(
+        partial(store_docket_report, pk, etag, language, job_key)
+    )
+    return JOB_PENDING
+
+
+def render_docket_reports(queryset):
+    """
+    Render the reports of the dockets of a queryset in parallel on the
+    shared process pool, yields their filename and the path of a
+    temporary file in order, removed by the caller. Only a few reports
+    per worker are in flight, so memory stays flat.
+    """
+    executor = get_executor()
+    language = translation.get_language()
+    pending = deque()
+    try:
+        for report in iter_docket_reports(queryset):
+            pending.append(
+                executor.submit(render_docket_report, report, language)
+            )
+            if len(pending) >= DOCKET_REPORT_WORKERS * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Remove the reports left when the stream is closed early.
+        for future in pending:
+            if not future.cancel() and future.exception() is None:
+                os.unlink(future.result()[1])
+
+
+class StreamBuffer:
+    """Write-only file keeping the chunks written until they are popped."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        """Write a chunk."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Nothing to flush, chunks are popped by the stream."""
+
+    def pop(self):
+        """Pop the chunks written so far."""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_docket_reports_zip(queryset):
+    """Stream a ZIP file with the reports of the dockets of a queryset."""
+    buff = StreamBuffer()
+    with ZipFile(buff, 'w', ZIP_STORED) as archive:
+        for filename, path in render_docket_reports(queryset):
+            # Copy the report in chunks, so it is never whole in memory.
+            try:
+                with open(path, 'rb') as report, \
+                        archive.open(filename, 'w') as entry:
+                    for chunk in iter(
+                            partial(report.read, DOCKET_REPORT_CHUNK_SIZE),
+                            b''):
+                        entry.write(chunk)
+                        yield buff.pop()
+            finally:
+                os.unlink(path)
+            yield buff.pop()
+    yield buff.pop()
@@ -5,6 +5,8 @@ from phonenumber_field.modelfields import PhoneNumberField
 from phonenumber_field.widgets import PhoneNumberInternationalFallbackWidget
 from reversion.admin import VersionAdmin
 
+from .paginator import (EstimatedCountChangeList, EstimatedCountPaginator,
+                        KeysetChangeList)
 from .settings import SITE_HEADER, SITE_TITLE
 
 
@@ -29,7 +31,30 @@ class AdminSite(admin.AdminSite):
         extra_context['app_list'] = app_list
         return super().index(request, extra_context)
 
-class BaseModelAdmin(VersionAdmin, admin.ModelAdmin):
+class EstimatedCountMixin:
+    """
+    ModelAdmin mixin counting large changelists with the planner
+    estimates instead of COUNT(*).
+    """
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        """Get changelist method."""
+        return EstimatedCountChangeList
+
+class KeysetPaginationMixin(EstimatedCountMixin):
+    """
+    ModelAdmin mixin paginating changelists ordered by -created_at by
+    keyset instead of offset.
+    """
+    keyset_pagination = True
+    change_list_template = 'admin/netexgl/change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        """Get changelist method."""
+        return KeysetChangeList
+
+class BaseModelAdmin(KeysetPaginationMixin, VersionAdmin, admin.ModelAdmin):
     """Base ModelAdmin."""
     date_hierarchy = 'created_at'
 
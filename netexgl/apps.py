@@ -1,6 +1,9 @@
 """netexgl.apps.py"""
 
+from django.apps import AppConfig
 from django.contrib.admin.apps import AdminConfig as BaseAdminConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.utils.translation import ugettext_lazy as _
 
 
 class AdminConfig(BaseAdminConfig):
@@ -8,3 +11,23 @@ class AdminConfig(BaseAdminConfig):
     Proyect adminc config.
     """
     default_site = 'netexgl.admin.AdminSite'
+
+    def ready(self):
+        """Discover admin modules and connect search signals."""
+        super().ready()
+        from .signals import setup_search_indexes # pylint: disable=C0415
+        post_migrate.connect(setup_search_indexes, sender=self)
+
+
+class NetexglConfig(AppConfig):
+    """App config."""
+    name = 'netexgl'
+    verbose_name = _("NETEX ERP")
+
+    def ready(self):
+        """Connect app signals."""
+        from .signals import ( # pylint: disable=C0415
+            count_created, count_deleted
+        )
+        post_save.connect(count_created, dispatch_uid='netexgl_count_created')
+        post_delete.connect(count_deleted, dispatch_uid='netexgl_count_deleted')
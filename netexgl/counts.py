@@ -0,0 +1,84 @@
+"""netexgl.counts.py"""
+
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyCount
+
+
+def get_day(value):
+    """Get the day of a date time in the current time zone."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def add_daily_counts(model, values, sign=1, using=None):
+    """
+    Add to the daily counts of a model the created_at values of rows
+    created, or subtract those of rows deleted with sign=-1, in a single
+    upsert. The upsert runs once the transaction is committed, so the
+    count row of a day is not locked by concurrent transactions until
+    they end, and rolled back rows are not counted.
+    """
+    counts = Counter(get_day(value) for value in values if value)
+    if not counts:
+        return
+    using = using or router.db_for_write(DailyCount)
+    connection = connections[using]
+    content_type = ContentType.objects.db_manager(using).get_for_model(model)
+    table = connection.ops.quote_name(DailyCount._meta.db_table)
+    rows = [
+        (content_type.pk, day, sign * count)
+        for day, count in sorted(counts.items())
+    ]
+    sql = (
+        'INSERT INTO {0} (content_type_id, day, count) VALUES {1} '
+        'ON CONFLICT (content_type_id, day) '
+        'DO UPDATE SET count = {0}.count + EXCLUDED.count'.format(
+            table, ', '.join(['(%s, %s, %s)'] * len(rows))
+        )
+    )
+    params = [value for row in rows for value in row]
+
+    def upsert():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    transaction.on_commit(upsert, using=using)
+
+
+def rebuild_daily_counts(model, using=None):
+    """Rebuild the daily counts of a model, returns the number of days."""
+    using = using or router.db_for_write(DailyCount)
+    content_type = ContentType.objects.db_manager(using).get_for_model(model)
+    days = model._default_manager.using(using).annotate(
+        day=TruncDate('created_at')
+    ).values('day').annotate(count=Count('pk')).order_by()
+    with transaction.atomic(using=using):
+        DailyCount.objects.using(using).filter(
+            content_type=content_type
+        ).delete()
+        counts = DailyCount.objects.using(using).bulk_create([
+            DailyCount(
+                content_type=content_type,
+                day=day['day'],
+                count=day['count']
+            )
+            for day in days
+        ])
+    return len(counts)
+
+
+def get_daily_counts(model, **filters):
+    """Get the days with rows of a model."""
+    return DailyCount.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        count__gt=0,
+        **filters
+    )
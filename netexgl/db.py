@@ -0,0 +1,118 @@
+"""netexgl.db.py"""
+
+import json
+
+from django.db import connections
+from django.db.backends.utils import truncate_name
+from phonenumber_field.modelfields import PhoneNumberField
+
+
+def create_extension(name, using='default'):
+    """Create a PostgreSQL extension if it does not exist."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE EXTENSION IF NOT EXISTS {0}'.format(
+                connection.ops.quote_name(name)
+            )
+        )
+
+
+def get_trigram_index_name(table, column, using='default'):
+    """Get the name of the trigram index of a column."""
+    return truncate_name(
+        '{0}_{1}_trgm'.format(table, column),
+        connections[using].ops.max_name_length()
+    )
+
+
+def create_trigram_index(table, column, using='default'):
+    """
+    Create a pg_trgm GIN index on the text cast of a column, it serves
+    (column)::text ILIKE '%term%' lookups on citext, uuid and numeric
+    columns as well as on plain text ones.
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS {0} ON {1} '
+            'USING gin (({2}::text) gin_trgm_ops)'.format(
+                quote_name(get_trigram_index_name(table, column, using)),
+                quote_name(table),
+                quote_name(column)
+            )
+        )
+
+
+def create_expression_index(table, name, expressions, using='default'):
+    """Create a btree index on SQL expressions of a table."""
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS {0} ON {1} ({2})'.format(
+                quote_name(name),
+                quote_name(table),
+                ', '.join('({0})'.format(sql) for sql in expressions)
+            )
+        )
+
+
+def get_phone_fields(model):
+    """Get the phone number fields of a model."""
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, PhoneNumberField)
+    ]
+
+
+def get_phone_digits_sql(column):
+    """
+    Get the digits of a phone number column as SQL, in the "C" collation
+    so a btree index serves both equality and LIKE prefixes.
+    """
+    return (
+        "regexp_replace({0}::text, '[^0-9]', '', 'g') COLLATE \"C\"".format(
+            column
+        )
+    )
+
+
+def get_phone_digits_index(model, field, using='default'):
+    """Get the name of the digits index of a phone number field."""
+    return truncate_name(
+        '{0}_{1}_digits'.format(model._meta.db_table, field.column),
+        connections[using].ops.max_name_length()
+    )
+
+
+def create_phone_digits_indexes(model, using='default'):
+    """Create the digits indexes of the phone number fields of a model."""
+    quote_name = connections[using].ops.quote_name
+    for field in get_phone_fields(model):
+        create_expression_index(
+            model._meta.db_table,
+            get_phone_digits_index(model, field, using),
+            [get_phone_digits_sql(quote_name(field.column))],
+            using
+        )
+
+
+def explain_queryset(queryset):
+    """Get the JSON query plan of a queryset."""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def iter_plan_nodes(plan):
+    """Iterate over the nodes of a query plan."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from iter_plan_nodes(child)
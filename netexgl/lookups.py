@@ -0,0 +1,75 @@
+"""netexgl.lookups.py"""
+
+from django.db.models import (CharField, DecimalField, FloatField, ForeignKey,
+                              IntegerField, Lookup, TextField, UUIDField)
+from django.db.models.lookups import IContains, StartsWith
+
+
+class TrigramContains(IContains):
+    """
+    Case-insensitive containment written as (column)::text ILIKE, the
+    expression indexed by the trigram GIN indexes of the admin search.
+    """
+    lookup_name = 'trigram_contains'
+
+    def as_postgresql(self, compiler, connection):
+        """Render the lookup on PostgreSQL."""
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return (
+            '({0})::text ILIKE {1}'.format(lhs, rhs),
+            (*lhs_params, *rhs_params)
+        )
+
+
+class PrefixLike(StartsWith):
+    """
+    Case-sensitive prefix match written as a plain LIKE, without the
+    text cast Django adds, so it matches expression indexes such as
+    (lower(column) COLLATE "C").
+    """
+    lookup_name = 'prefix_like'
+
+    def as_postgresql(self, compiler, connection):
+        """Render the lookup on PostgreSQL."""
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return (
+            '{0} LIKE {1}'.format(lhs, rhs),
+            (*lhs_params, *rhs_params)
+        )
+
+
+class InArray(Lookup):
+    """
+    Foreign key in the ids returned by a subquery, written as
+    column = ANY(ARRAY(subquery)) so the subquery runs once and the
+    foreign key index is used, even inside an OR.
+    """
+    lookup_name = 'in_array'
+
+    def as_sql(self, compiler, connection):
+        """Render the lookup."""
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return (
+            '{0} = ANY(ARRAY{1})'.format(lhs, rhs),
+            (*lhs_params, *rhs_params)
+        )
+
+
+# Fields whose text cast is immutable, so it can be trigram indexed.
+TRIGRAM_FIELDS = (
+    CharField,
+    TextField,
+    UUIDField,
+    IntegerField,
+    FloatField,
+    DecimalField,
+)
+
+for field_class in TRIGRAM_FIELDS:
+    field_class.register_lookup(TrigramContains)
+CharField.register_lookup(PrefixLike)
+TextField.register_lookup(PrefixLike)
+ForeignKey.register_lookup(InArray)
@@ -0,0 +1 @@
+"""netexgl.management.__init__.py"""
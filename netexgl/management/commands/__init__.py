@@ -0,0 +1 @@
+"""netexgl.management.commands.__init__.py"""
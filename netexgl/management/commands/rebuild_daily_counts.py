@@ -0,0 +1,23 @@
+"""netexgl.management.commands.rebuild_daily_counts.py"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from netexgl.counts import rebuild_daily_counts
+from netexgl.models import BaseModel
+
+
+class Command(BaseCommand):
+    """Rebuild the daily counts of the date hierarchies."""
+    help = (
+        'Rebuild the daily counts drawn by the admin date hierarchies '
+        'from the rows of every model, after the first migrate or after '
+        'rows changed without signals.'
+    )
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if issubclass(model, BaseModel):
+                days = rebuild_daily_counts(model)
+                self.stdout.write('{0}: {1} days.'.format(
+                    model._meta.label, days
+                ))
@@ -3,8 +3,9 @@
 from uuid import uuid4
 
 from django.contrib.postgres.fields import CITextField
-from django.db.models import (CASCADE, DateTimeField, ForeignKey, Model,
-                              UUIDField)
+from django.db.models import (CASCADE, BigIntegerField, DateField,
+                              DateTimeField, ForeignKey, Index, Model,
+                              UniqueConstraint, UUIDField)
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -31,10 +32,51 @@ class BaseModel(Model):
         auto_now=True,
         blank=True,
         null=True,
-        editable=False
+        editable=False,
+        db_index=True
     )
 
     class Meta:
         """Model meta."""
         abstract = True
         ordering = ['-created_at']
+        indexes = [
+            # Ordering, date hierarchy and keyset pagination.
+            Index(
+                fields=['created_at', 'id'],
+                name='%(app_label)s_%(class)s_ks'
+            )
+        ]
+
+
+class DailyCount(Model):
+    """
+    Define the number of rows of a model created on each day, drawn by
+    the date hierarchy of the admin changelists.
+    """
+    content_type = ForeignKey(
+        'contenttypes.ContentType',
+        verbose_name=_('Content Type'),
+        on_delete=CASCADE
+    )
+    day = DateField(
+        _('Day')
+    )
+    count = BigIntegerField(
+        _('Count'),
+        default=0
+    )
+
+    class Meta:
+        """Model meta."""
+        verbose_name = _('daily count')
+        verbose_name_plural = _('daily counts')
+        constraints = [
+            UniqueConstraint(
+                fields=['content_type', 'day'],
+                name='netexgl_dailycount_unique'
+            )
+        ]
+
+    def __str__(self):
+        return '{0} {1}: {2}'.format(self.content_type, self.day, self.count)
@@ -0,0 +1,257 @@
+"""netexgl.paginator.py"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from uuid import UUID
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import (EmptyPage, InvalidPage, PageNotAnInteger,
+                                   Paginator)
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .db import explain_queryset
+from .settings import ADMIN_ESTIMATED_COUNT_THRESHOLD
+
+# Querystring parameter of the keyset pagination cursor.
+CURSOR_VAR = 'cursor'
+
+# Changelist ordering paginated by keyset.
+KEYSET_ORDERING = ('-created_at', '-pk')
+
+
+def get_table_estimate(model, using='default'):
+    """
+    Get the number of rows of the table of a model estimated by the
+    planner statistics, or None if the table was never analyzed.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def get_query_estimate(queryset):
+    """Get the number of rows of a queryset estimated by EXPLAIN."""
+    return explain_queryset(queryset.order_by())['Plan Rows']
+
+
+def get_estimated_count(queryset, threshold=ADMIN_ESTIMATED_COUNT_THRESHOLD):
+    """
+    Count the rows of a queryset, estimated when the estimate is at
+    least the threshold and exact below it. Returns the count and if it
+    is estimated.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count(), False
+    if queryset.query.where:
+        estimate = get_query_estimate(queryset)
+    else:
+        estimate = get_table_estimate(queryset.model, queryset.db)
+    if estimate is None or estimate < threshold:
+        return queryset.count(), False
+    return estimate, True
+
+
+def encode_cursor(created_at, pk, backwards=False):
+    """Encode an opaque keyset pagination cursor."""
+    data = json.dumps([created_at.isoformat(), str(pk), backwards])
+    return urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a keyset pagination cursor, returns its creation date, primary
+    key and if it pages backwards. Raises ValueError if it is invalid.
+    """
+    try:
+        data = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        created_at, pk, backwards = data
+        created_at = parse_datetime(created_at)
+        pk = UUID(pk)
+    except (BinasciiError, TypeError, ValueError) as error:
+        raise ValueError('Invalid cursor {0}.'.format(cursor)) from error
+    if created_at is None:
+        raise ValueError('Invalid cursor {0}.'.format(cursor))
+    return created_at, pk, bool(backwards)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting large querysets with the planner estimates. Pages
+    past an estimated count are not rejected, they may just be empty.
+    """
+    threshold = ADMIN_ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def counted(self):
+        """Get the count and if it is estimated."""
+        if isinstance(self.object_list, QuerySet):
+            return get_estimated_count(self.object_list, self.threshold)
+        return len(self.object_list), False
+
+    @cached_property
+    def count(self):
+        """Return the total number of objects, maybe estimated."""
+        return self.counted[0]
+
+    @property
+    def estimated(self):
+        """Return if the count is estimated."""
+        return self.counted[1]
+
+    def validate_number(self, number):
+        """Validate the given 1-based page number."""
+        if not self.estimated:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self._('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(self._('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        """Return a Page object for the given 1-based page number."""
+        if not self.estimated:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+
+class EstimatedCountChangeList(ChangeList):
+    """
+    Changelist counting its results and the full result with the
+    planner estimates on large tables, and exact counts on small ones.
+    A count is run once when no filter or search is applied.
+    """
+
+    def get_results(self, request):
+        """Get results method."""
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        # Get the number of objects, with admin filters applied.
+        result_count = paginator.count
+        estimated = getattr(paginator, 'estimated', False)
+
+        # Get the total number of objects, with no admin filters applied.
+        if not self.model_admin.show_full_result_count:
+            full_result_count = None
+        elif not self.queryset.query.where:
+            full_result_count = result_count
+        else:
+            full_result_count = get_estimated_count(
+                self.root_queryset,
+                getattr(paginator, 'threshold', ADMIN_ESTIMATED_COUNT_THRESHOLD)
+            )[0]
+        can_show_all = not estimated and \
+            result_count <= self.list_max_show_all
+        multi_page = result_count > self.list_per_page
+
+        # Get the list of objects to display on this page.
+        if (self.show_all and can_show_all) or not multi_page:
+            result_list = self.queryset._clone()
+        else:
+            try:
+                result_list = paginator.page(self.page_num + 1).object_list
+            except InvalidPage:
+                raise IncorrectLookupParameters
+
+        self.result_count = result_count
+        self.result_count_estimated = estimated
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        # Admin actions are shown if there is at least one entry
+        # or if entries are not counted because show_full_result_count is disabled
+        self.show_admin_actions = not self.show_full_result_count or \
+            bool(full_result_count)
+        self.full_result_count = full_result_count
+        self.result_list = result_list
+        self.can_show_all = can_show_all
+        self.multi_page = multi_page
+        self.paginator = paginator
+
+
+class KeysetChangeList(EstimatedCountChangeList):
+    """
+    Changelist paginated by keyset on (created_at, id) when it is ordered
+    by its default -created_at ordering. Pages are sought with a cursor
+    on the last row shown, so page N costs the same as page 1. Other
+    orderings are paginated by offset.
+    """
+    keyset = False
+    first_url = None
+    next_url = None
+    previous_url = None
+
+    def get_filters_params(self, params=None):
+        """Return all params except IGNORED_PARAMS and the cursor."""
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        """Get a query string, the cursor is dropped unless it is set."""
+        return super().get_query_string(
+            {CURSOR_VAR: None, **(new_params or {})}, remove
+        )
+
+    def get_results(self, request):
+        """Get results method."""
+        super().get_results(request)
+        if not getattr(self.model_admin, 'keyset_pagination', False) or \
+                self.show_all or \
+                tuple(self.queryset.query.order_by) != KEYSET_ORDERING:
+            return
+        backwards = False
+        queryset = self.queryset
+        cursor = self.params.get(CURSOR_VAR)
+        if cursor:
+            try:
+                created_at, pk, backwards = decode_cursor(cursor)
+            except ValueError:
+                raise IncorrectLookupParameters
+            # Seek on created_at so the index scan starts at the cursor.
+            if backwards:
+                queryset = queryset.filter(created_at__gte=created_at).exclude(
+                    created_at=created_at, pk__lte=pk
+                ).order_by('created_at', 'pk')
+            else:
+                queryset = queryset.filter(created_at__lte=created_at).exclude(
+                    created_at=created_at, pk__gte=pk
+                )
+        rows = list(
+            queryset.values_list('created_at', 'pk')[:self.list_per_page + 1]
+        )
+        more = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if backwards:
+            rows.reverse()
+
+        self.keyset = True
+        self.multi_page = bool(cursor) or more
+        self.result_list = self.queryset.filter(pk__in=[pk for _c, pk in rows])
+        self.first_url = self.get_query_string()
+        if rows and (more or backwards):
+            self.next_url = self.get_query_string(
+                {CURSOR_VAR: encode_cursor(*rows[-1])}
+            )
+        if rows and cursor and (more or not backwards):
+            self.previous_url = self.get_query_string(
+                {CURSOR_VAR: encode_cursor(*rows[0], backwards=True)}
+            )
@@ -0,0 +1,208 @@
+"""netexgl.search.py"""
+
+import operator
+import re
+from functools import reduce
+
+import phonenumbers
+from django.conf import settings
+from django.contrib.admin.utils import lookup_needs_distinct
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import ForeignKey, Q, TextField
+from django.db.models.expressions import RawSQL
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.text import smart_split, unescape_string_literal
+
+from .db import get_phone_digits_sql, get_phone_fields
+from .lookups import TRIGRAM_FIELDS
+
+# Search terms made of these characters are searched as phone numbers.
+PHONE_SEARCH_RE = re.compile(r'\+?[0-9\s().-]+')
+
+# Least digits of a phone number search.
+PHONE_SEARCH_MIN_DIGITS = 4
+
+
+def get_search_field(model, field_name):
+    """
+    Get the relation and field of a search field, the relation is None
+    for fields of the model itself. Returns None for search fields not
+    covered by trigram indexes: prefixed ones, explicit lookups, fields
+    behind more than one relation or reverse relations.
+    """
+    if field_name.startswith(('^', '=', '@')):
+        return None
+    parts = field_name.split(LOOKUP_SEP)
+    if len(parts) > 2:
+        return None
+    relation = None
+    try:
+        if len(parts) == 2:
+            relation = model._meta.get_field(parts[0])
+            if not isinstance(relation, ForeignKey):
+                return None
+            model = relation.related_model
+        field = model._meta.get_field(
+            model._meta.pk.name if parts[-1] == 'pk' else parts[-1]
+        )
+    except FieldDoesNotExist:
+        return None
+    if not isinstance(field, TRIGRAM_FIELDS) or field.is_relation:
+        return None
+    return relation, field
+
+
+def construct_search(model, field_name):
+    """Get the lookup Django admin search uses for a search field."""
+    if field_name.startswith('^'):
+        return '{0}__istartswith'.format(field_name[1:])
+    if field_name.startswith('='):
+        return '{0}__iexact'.format(field_name[1:])
+    if field_name.startswith('@'):
+        return '{0}__search'.format(field_name[1:])
+    opts = model._meta
+    prev_field = None
+    for path_part in field_name.split(LOOKUP_SEP):
+        if path_part == 'pk':
+            path_part = opts.pk.name
+        try:
+            field = opts.get_field(path_part)
+        except FieldDoesNotExist:
+            if prev_field and prev_field.get_lookup(path_part):
+                return field_name
+        else:
+            prev_field = field
+            if hasattr(field, 'get_path_info'):
+                opts = field.get_path_info()[-1].to_opts
+    return '{0}__icontains'.format(field_name)
+
+
+def get_trigram_columns(model, search_fields):
+    """Get the models and columns to trigram index for the search fields."""
+    columns = []
+    for field_name in search_fields:
+        search_field = get_search_field(model, str(field_name))
+        if search_field is None:
+            continue
+        field = search_field[1]
+        columns.append((field.model, field.column))
+    return columns
+
+
+def get_phone_search_lookups(term):
+    """
+    Parse a search term once as a phone number, returns the lookups and
+    digits matching it or None if it is not a phone number. A valid
+    number is matched whole, as it is stored, other digits are matched
+    as a prefix, with and without the default country code.
+    """
+    term = term.strip()
+    digits = re.sub(r'[^0-9]', '', term)
+    if not PHONE_SEARCH_RE.fullmatch(term) or \
+            len(digits) < PHONE_SEARCH_MIN_DIGITS:
+        return None
+    region = getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+    try:
+        number = phonenumbers.parse(term, region)
+    except phonenumbers.NumberParseException:
+        number = None
+    if number is not None and phonenumbers.is_valid_number(number):
+        return [('exact', phonenumbers.format_number(
+            number, phonenumbers.PhoneNumberFormat.E164
+        )[1:])]
+    lookups = [('prefix_like', digits)]
+    country_code = phonenumbers.country_code_for_region(region or '')
+    if not term.startswith('+') and country_code:
+        lookups.append(('prefix_like', str(country_code) + digits))
+    return lookups
+
+
+class PhoneSearchMixin:
+    """
+    Admin search of phone numbers on the digits indexes of the phone
+    number fields. A search term that is a phone number, such as a
+    caller ID, is only matched on the digits of every phone number
+    field, so each branch of the search OR is an index scan.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        """Get search results method."""
+        lookups = get_phone_search_lookups(search_term)
+        fields = get_phone_fields(queryset.model)
+        if lookups is None or not fields:
+            return super().get_search_results(request, queryset, search_term)
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(queryset.model._meta.db_table)
+        queryset = queryset.annotate(**{
+            field.name + '_digits': RawSQL(
+                get_phone_digits_sql(
+                    '{0}.{1}'.format(table, quote_name(field.column))
+                ),
+                [],
+                output_field=TextField()
+            )
+            for field in fields
+        })
+        return queryset.filter(reduce(operator.or_, (
+            Q(**{field.name + '_digits__' + lookup: digits})
+            for field in fields
+            for lookup, digits in lookups
+        ))), False
+
+
+class TrigramSearchMixin:
+    """
+    Admin search on pg_trgm GIN indexes. Fields of the model are matched
+    with (column)::text ILIKE, fields behind a foreign key are matched on
+    the related table first, and its ids compared with the foreign key,
+    so every branch of the search OR is an index scan. Other search
+    fields are searched as Django does.
+    """
+
+    def get_search_query(self, request, queryset, bit):
+        """Get the query matching one word of a search."""
+        model = queryset.model
+        queries = []
+        relations = {}
+        for field_name in self.get_search_fields(request):
+            search_field = get_search_field(model, str(field_name))
+            if search_field is None:
+                lookup = construct_search(model, str(field_name))
+                queries.append(Q(**{lookup: bit}))
+                continue
+            relation, field = search_field
+            lookup = field.name + '__trigram_contains'
+            if relation is None:
+                queries.append(Q(**{lookup: bit}))
+            else:
+                relations.setdefault(relation, []).append(Q(**{lookup: bit}))
+        for relation, related_queries in relations.items():
+            related = relation.related_model._default_manager.filter(
+                reduce(operator.or_, related_queries)
+            ).values('pk')
+            queries.append(Q(**{relation.name + '__in_array': related}))
+        return reduce(operator.or_, queries)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Get search results method."""
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return super().get_search_results(request, queryset, search_term)
+
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            queryset = queryset.filter(
+                self.get_search_query(request, queryset, bit)
+            )
+
+        use_distinct = any(
+            lookup_needs_distinct(
+                self.opts, construct_search(queryset.model, str(field_name))
+            )
+            for field_name in search_fields
+            if get_search_field(queryset.model, str(field_name)) is None
+        )
+        return queryset, use_distinct
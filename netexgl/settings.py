@@ -56,6 +56,7 @@ INSTALLED_APPS = [
     'django_unused_media',
     'phonenumber_field',
     'reversion',
+    'netexgl.apps.NetexglConfig',
     'thirdparty',
     'freight',
     'accounting',
@@ -210,3 +211,6 @@ APP_ORDER = [
     'auth',
     'axes'
 ]
+
+# Rows from which admin changelists show estimated counts.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
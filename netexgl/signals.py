@@ -0,0 +1,43 @@
+"""netexgl.signals.py"""
+
+from django.contrib import admin
+from django.db import connections
+
+from .counts import add_daily_counts
+from .db import create_extension, create_trigram_index
+from .models import BaseModel
+from .search import TrigramSearchMixin, get_trigram_columns
+
+
+def setup_search_indexes(sender, using, **kwargs): # pylint: disable=W0613
+    """
+    Create the trigram indexes of the search fields of the admins using
+    TrigramSearchMixin after migrate.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    columns = set()
+    for model, model_admin in admin.site._registry.items(): # pylint: disable=W0212
+        if isinstance(model_admin, TrigramSearchMixin):
+            columns.update(get_trigram_columns(model, model_admin.search_fields))
+    if not columns:
+        return
+    tables = connection.introspection.table_names()
+    create_extension('pg_trgm', using)
+    for model, column in sorted(
+            columns, key=lambda item: (item[0]._meta.db_table, item[1])):
+        if model._meta.db_table in tables:
+            create_trigram_index(model._meta.db_table, column, using)
+
+
+def count_created(sender, instance, created, using=None, **kwargs): # pylint: disable=W0613
+    """Count a row created on its day."""
+    if created and isinstance(instance, BaseModel):
+        add_daily_counts(sender, [instance.created_at], using=using)
+
+
+def count_deleted(sender, instance, using=None, **kwargs): # pylint: disable=W0613
+    """Uncount a row deleted from its day."""
+    if isinstance(instance, BaseModel):
+        add_daily_counts(sender, [instance.created_at], -1, using)
@@ -0,0 +1 @@
+"""netexgl.templatetags.__init__.py"""
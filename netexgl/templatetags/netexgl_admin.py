@@ -0,0 +1,124 @@
+"""netexgl.templatetags.netexgl_admin.py"""
+
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.db.models import Max, Min
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+from ..counts import get_daily_counts
+from ..models import BaseModel
+
+register = template.Library()
+
+
+def has_daily_counts(cl):
+    """
+    Check if the date hierarchy of a changelist can be drawn from the
+    daily counts: it is on created_at and no filter or search is active.
+    """
+    if cl.date_hierarchy != 'created_at' or \
+            not issubclass(cl.model, BaseModel) or cl.query:
+        return False
+    return not [
+        param for param in cl.get_filters_params()
+        if not param.startswith('created_at__')
+    ]
+
+
+def get_date_hierarchy(cl):
+    """Get the date hierarchy of a changelist from the daily counts."""
+    year_field = 'created_at__year'
+    month_field = 'created_at__month'
+    day_field = 'created_at__day'
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+    counts = get_daily_counts(cl.model)
+
+    def link(filters):
+        return cl.get_query_string(filters, ['created_at__'])
+
+    if not (year_lookup or month_lookup or day_lookup):
+        # Select appropriate start level.
+        date_range = counts.aggregate(first=Min('day'), last=Max('day'))
+        if date_range['first'] and date_range['last']:
+            if date_range['first'].year == date_range['last'].year:
+                year_lookup = date_range['first'].year
+                if date_range['first'].month == date_range['last'].month:
+                    month_lookup = date_range['first'].month
+
+    if year_lookup and month_lookup and day_lookup:
+        day = datetime.date(
+            int(year_lookup), int(month_lookup), int(day_lookup)
+        )
+        return {
+            'show': True,
+            'back': {
+                'link': link({
+                    year_field: year_lookup,
+                    month_field: month_lookup
+                }),
+                'title': capfirst(formats.date_format(day, 'YEAR_MONTH_FORMAT'))
+            },
+            'choices': [{
+                'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT'))
+            }]
+        }
+    if year_lookup and month_lookup:
+        days = counts.filter(
+            day__year=year_lookup, day__month=month_lookup
+        ).dates('day', 'day')
+        return {
+            'show': True,
+            'back': {
+                'link': link({year_field: year_lookup}),
+                'title': str(year_lookup)
+            },
+            'choices': [{
+                'link': link({
+                    year_field: year_lookup,
+                    month_field: month_lookup,
+                    day_field: day.day
+                }),
+                'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT'))
+            } for day in days]
+        }
+    if year_lookup:
+        months = counts.filter(day__year=year_lookup).dates('day', 'month')
+        return {
+            'show': True,
+            'back': {
+                'link': link({}),
+                'title': _('All dates')
+            },
+            'choices': [{
+                'link': link({year_field: year_lookup, month_field: month.month}),
+                'title': capfirst(formats.date_format(month, 'YEAR_MONTH_FORMAT'))
+            } for month in months]
+        }
+    years = counts.dates('day', 'year')
+    return {
+        'show': True,
+        'back': None,
+        'choices': [{
+            'link': link({year_field: str(year.year)}),
+            'title': str(year.year),
+        } for year in years]
+    }
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def daily_date_hierarchy(cl):
+    """
+    Display the date hierarchy of a changelist from the daily counts, or
+    from its rows when filters or a search are active.
+    """
+    if not cl.date_hierarchy:
+        return {}
+    if has_daily_counts(cl):
+        return get_date_hierarchy(cl)
+    return date_hierarchy(cl)
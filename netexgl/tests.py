@@ -0,0 +1,88 @@
+"""netexgl.tests.py"""
+
+from django.contrib import admin
+from django.db import connection
+from django.test import TestCase
+
+from .db import explain_queryset, get_trigram_index_name, iter_plan_nodes
+from .search import TrigramSearchMixin, get_trigram_columns
+
+# Search term of the query plan tests.
+SEARCH_TERM = 'acme'
+
+
+def get_trigram_admins():
+    """Get the registered model admins using TrigramSearchMixin."""
+    return [
+        model_admin
+        for model_admin in admin.site._registry.values() # pylint: disable=W0212
+        if isinstance(model_admin, TrigramSearchMixin)
+    ]
+
+
+def get_trigram_fields(model_admin):
+    """Get the models, fields and trigram indexes of an admin search."""
+    fields = []
+    # Columns of a related model may be searched through several relations.
+    for model, column in dict.fromkeys(get_trigram_columns(
+            model_admin.model, model_admin.search_fields)):
+        field = next(
+            field for field in model._meta.concrete_fields
+            if field.column == column
+        )
+        fields.append((
+            model, field, get_trigram_index_name(model._meta.db_table, column)
+        ))
+    return fields
+
+
+class TrigramSearchTests(TestCase):
+    """Test the trigram search of the admins using TrigramSearchMixin."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            # Sequential scans are left only where no index applies,
+            # whatever the size of the tables.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_trigram_indexes(self):
+        """Every column searched by trigram has its index."""
+        for model_admin in get_trigram_admins():
+            for model, field, index in get_trigram_fields(model_admin):
+                with self.subTest(model=model.__name__, field=field.name):
+                    with connection.cursor() as cursor:
+                        constraints = connection.introspection.get_constraints(
+                            cursor, model._meta.db_table
+                        )
+                    self.assertIn(index, constraints)
+
+    def test_trigram_lookups(self):
+        """A trigram lookup on a searched column uses its index."""
+        for model_admin in get_trigram_admins():
+            for model, field, index in get_trigram_fields(model_admin):
+                with self.subTest(model=model.__name__, field=field.name):
+                    plan = explain_queryset(
+                        model._default_manager.order_by().filter(**{
+                            field.name + '__trigram_contains': SEARCH_TERM
+                        })
+                    )
+                    self.assertIn(index, {
+                        node.get('Index Name')
+                        for node in iter_plan_nodes(plan)
+                    })
+
+    def test_search_plans(self):
+        """Admin searches use indexes on every table they search."""
+        for model_admin in get_trigram_admins():
+            with self.subTest(model=model_admin.model.__name__):
+                queryset = model_admin.get_search_results(
+                    None,
+                    model_admin.model._default_manager.order_by(),
+                    SEARCH_TERM
+                )[0]
+                plan = explain_queryset(queryset)
+                self.assertEqual([
+                    node.get('Relation Name')
+                    for node in iter_plan_nodes(plan)
+                    if node['Node Type'] == 'Seq Scan'
+                ], [])
@@ -1,13 +1,85 @@
 """thirdparty.admin.py"""
 
-from django.contrib import admin
+import reversion
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.utils import model_ngettext
+from django.template.response import TemplateResponse
+from django.utils.translation import ugettext_lazy as _
 from netexgl.admin import BaseModelAdmin
+from netexgl.search import PhoneSearchMixin
 
+from .autocomplete import (CompanyAutocompleteJsonView,
+                           IndividualAutocompleteJsonView)
+from .dedupe import get_merge_counts, merge_parties
 from .models import Company, Individual
 
 
+def merge_selected_parties(modeladmin, request, queryset):
+    """
+    Merge the selected parties into the oldest one, once confirmed on a
+    page showing the party kept and the related rows moved.
+    """
+    parties = list(queryset.order_by('created_at', 'pk'))
+    if len(parties) < 2:
+        modeladmin.message_user(
+            request,
+            _('Select at least two parties to merge.'),
+            messages.WARNING
+        )
+        return None
+    target, duplicates = parties[0], parties[1:]
+
+    # The user has already confirmed the merge.
+    if request.POST.get('post'):
+        repointed = merge_parties(target, duplicates)
+        reversion.add_to_revision(target)
+        reversion.set_comment(
+            _('Merged %(count)d duplicates into %(target)s.') % {
+                'count': len(duplicates),
+                'target': target,
+            }
+        )
+        modeladmin.message_user(
+            request,
+            _('Merged %(count)d duplicates into %(target)s, %(rows)d '
+              'related rows repointed.') % {
+                  'count': len(duplicates),
+                  'target': target,
+                  'rows': repointed,
+              },
+            messages.SUCCESS
+        )
+        return None
+
+    opts = modeladmin.model._meta
+    context = {
+        **modeladmin.admin_site.each_context(request),
+        'title': _('Are you sure?'),
+        'objects_name': str(model_ngettext(queryset)),
+        'target_name': str(opts.verbose_name),
+        'target': target,
+        'duplicates': duplicates,
+        'related_counts': get_merge_counts(
+            modeladmin.model, [party.pk for party in duplicates]
+        ),
+        'queryset': queryset,
+        'opts': opts,
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'media': modeladmin.media,
+    }
+    request.current_app = modeladmin.admin_site.name
+    return TemplateResponse(
+        request, 'admin/thirdparty/merge_selected_confirmation.html', context
+    )
+
+
+merge_selected_parties.short_description = _('Merge selected parties')
+merge_selected_parties.allowed_permissions = ('change', 'delete')
+
+
 @admin.register(Individual)
-class IndividualAdmin(BaseModelAdmin):
+class IndividualAdmin(PhoneSearchMixin, BaseModelAdmin):
     """Individual admin."""
     list_display = (
         'last_name',
@@ -26,13 +98,21 @@ class IndividualAdmin(BaseModelAdmin):
     search_fields = [
         'last_name',
         'first_name',
-        'phone_number_1',
-        'mobile_number',
         'email',
         'website',
     ]
+    actions = [
+        merge_selected_parties
+    ]
+
+    def autocomplete_view(self, request):
+        """Autocomplete view method."""
+        return IndividualAutocompleteJsonView.as_view(model_admin=self)(
+            request
+        )
+
 @admin.register(Company)
-class CompanyAdmin(BaseModelAdmin):
+class CompanyAdmin(PhoneSearchMixin, BaseModelAdmin):
     """Company admin."""
     list_display = (
         'company_name',
@@ -49,11 +129,16 @@ class CompanyAdmin(BaseModelAdmin):
     ]
     search_fields = [
         'company_name',
-        'phone_number_1',
-        'mobile_number',
         'email',
         'website',
     ]
     filter_horizontal = (
         'individuals',
     )
+    actions = [
+        merge_selected_parties
+    ]
+
+    def autocomplete_view(self, request):
+        """Autocomplete view method."""
+        return CompanyAutocompleteJsonView.as_view(model_admin=self)(request)
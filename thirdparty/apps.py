@@ -1,6 +1,7 @@
 """thirdparty.apps.py"""
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -8,3 +9,10 @@ class ThirdPartyConfig(AppConfig):
     """App config."""
     name = 'thirdparty'
     verbose_name = _("Third-party")
+
+    def ready(self):
+        """Connect app signals."""
+        from .signals import (setup_party_name_indexes, # pylint: disable=C0415
+                              setup_party_phone_indexes)
+        post_migrate.connect(setup_party_name_indexes, sender=self)
+        post_migrate.connect(setup_party_phone_indexes, sender=self)
@@ -0,0 +1,119 @@
+"""thirdparty.autocomplete.py"""
+
+from functools import reduce
+from operator import or_
+
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.db import connections
+from django.db.models import Q, TextField
+from django.db.models.expressions import RawSQL
+from django.http import JsonResponse
+from netexgl.db import create_expression_index
+
+from .models import Company, Individual
+
+# Lower cased names of each party model matched by prefix as SQL, in
+# the "C" collation so a btree index serves both LIKE prefixes and
+# ordering. The first one is the display name parties are ordered by.
+PARTY_NAME_SQL = {
+    Individual: {
+        'name': (
+            "lower(first_name::text || coalesce(' ' || last_name::text, '')) "
+            'COLLATE "C"'
+        ),
+        'last_name': 'lower(last_name::text) COLLATE "C"',
+    },
+    Company: {
+        'name': 'lower(company_name::text) COLLATE "C"',
+    },
+}
+
+
+def get_party_name_index(model, name='name'):
+    """Get the name of a name prefix index of a party model."""
+    return '{0}_{1}_prefix'.format(model._meta.db_table, name)
+
+
+def create_party_name_indexes(using='default'):
+    """Create the name prefix indexes of the party models."""
+    tables = connections[using].introspection.table_names()
+    for model, names in PARTY_NAME_SQL.items():
+        if model._meta.db_table not in tables:
+            continue
+        for name, sql in names.items():
+            create_expression_index(
+                model._meta.db_table,
+                get_party_name_index(model, name),
+                [sql, model._meta.pk.column],
+                using
+            )
+
+
+class PartyAutocompleteJsonView(AutocompleteJsonView):
+    """
+    Handle the autocomplete AJAX requests of parties. Display names, and
+    the other names of PARTY_NAME_SQL, are matched by prefix on their
+    indexes and read in display name order, with the primary key as tie
+    breaker, and only the columns of the display name are loaded. Pages
+    are read with one row more than shown instead of a count.
+    """
+    # Columns of the display name, joined by spaces as __str__ does.
+    fields = ()
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return a JsonResponse with search results of the form:
+        {
+            results: [{id: "123" text: "foo"}],
+            pagination: {more: true}
+        }
+        """
+        if not self.has_perm(request):
+            return JsonResponse({'error': '403 Forbidden'}, status=403)
+
+        self.term = request.GET.get('term', '').strip().lower()
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+        except ValueError:
+            page = 1
+        start = (page - 1) * self.paginate_by
+        rows = list(
+            self.get_queryset()[start:start + self.paginate_by + 1]
+        )
+        return JsonResponse({
+            'results': [
+                {'id': str(row[0]), 'text': self.get_text(*row[1:])}
+                for row in rows[:self.paginate_by]
+            ],
+            'pagination': {'more': len(rows) > self.paginate_by},
+        })
+
+    def get_queryset(self):
+        """Return the id and display name columns of matching parties."""
+        model = self.model_admin.model
+        queryset = self.model_admin.get_queryset(self.request).annotate(**{
+            'search_' + name: RawSQL(sql, [], output_field=TextField())
+            for name, sql in PARTY_NAME_SQL[model].items()
+        })
+        if self.term:
+            queryset = queryset.filter(reduce(or_, (
+                Q(**{'search_' + name + '__prefix_like': self.term})
+                for name in PARTY_NAME_SQL[model]
+            )))
+        return queryset.order_by('search_name', 'pk').values_list(
+            'pk', *self.fields
+        )
+
+    def get_text(self, *values):
+        """Get the display name of a party from its columns."""
+        return ' '.join(str(value) for value in values if value is not None)
+
+
+class IndividualAutocompleteJsonView(PartyAutocompleteJsonView):
+    """Handle the autocomplete AJAX requests of individuals."""
+    fields = ('first_name', 'last_name')
+
+
+class CompanyAutocompleteJsonView(PartyAutocompleteJsonView):
+    """Handle the autocomplete AJAX requests of companies."""
+    fields = ('company_name',)
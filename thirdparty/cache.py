@@ -0,0 +1,91 @@
+"""thirdparty.cache.py"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .settings import ADDRESS_FIELDS, PARTY_CACHE_STATS, PARTY_CACHE_TIMEOUT
+
+# Cache keys of the party cache counters.
+PARTY_CACHE_HITS = 'thirdparty:party_cache:hits'
+PARTY_CACHE_MISSES = 'thirdparty:party_cache:misses'
+
+# Fields of the parties cached apart from whole parties, by name.
+PARTY_CACHE_FIELDS = {
+    'address': ('created_at', 'updated_at', *ADDRESS_FIELDS),
+}
+
+
+def get_party_key(model, pk, fields=None):
+    """Get the cache key of a party, or of some of its fields."""
+    key = 'thirdparty:party:{0}:{1}'.format(model._meta.model_name, pk)
+    return key + ':' + fields if fields else key
+
+
+def count(key, value):
+    """Add to a party cache counter."""
+    if not PARTY_CACHE_STATS or not value:
+        return
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        # The counter is missing, or was just added by another process.
+        if not cache.add(key, value, None):
+            cache.incr(key, value)
+
+
+def get_party_cache_stats():
+    """Get the hits and misses of the party cache."""
+    stats = cache.get_many([PARTY_CACHE_HITS, PARTY_CACHE_MISSES])
+    return stats.get(PARTY_CACHE_HITS, 0), stats.get(PARTY_CACHE_MISSES, 0)
+
+
+def reset_party_cache_stats():
+    """Reset the hits and misses of the party cache."""
+    cache.delete_many([PARTY_CACHE_HITS, PARTY_CACHE_MISSES])
+
+
+def get_parties(model, pks, fields=None):
+    """
+    Get the parties of some primary keys by primary key, read from cache
+    and from a single query for those not cached. Parties are loaded
+    with only the fields of PARTY_CACHE_FIELDS named by fields, if set.
+    """
+    keys = {get_party_key(model, pk, fields): pk for pk in pks}
+    cached = cache.get_many(keys)
+    parties = {keys[key]: obj for key, obj in cached.items()}
+    missing = [pk for key, pk in keys.items() if key not in cached]
+    count(PARTY_CACHE_HITS, len(cached))
+    count(PARTY_CACHE_MISSES, len(missing))
+    if missing:
+        queryset = model.objects.filter(pk__in=missing).order_by()
+        if fields:
+            queryset = queryset.only(*PARTY_CACHE_FIELDS[fields])
+        loaded = {
+            get_party_key(model, obj.pk, fields): obj for obj in queryset
+        }
+        cache.set_many(loaded, PARTY_CACHE_TIMEOUT)
+        parties.update(
+            (keys[key], obj) for key, obj in loaded.items()
+        )
+    return parties
+
+
+def get_party(model, pk):
+    """Get a party from cache, or None if it does not exist."""
+    return get_parties(model, [pk]).get(pk)
+
+
+def delete_cached_parties(model, pks):
+    """
+    Delete parties from cache now and again on commit, so a stale party
+    read by another transaction before the commit is not kept.
+    """
+    keys = [
+        get_party_key(model, pk, fields)
+        for pk in pks
+        for fields in (None, *PARTY_CACHE_FIELDS)
+    ]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,321 @@
+"""thirdparty.dedupe.py"""
+
+import os
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import combinations, islice, repeat
+
+import django
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from netexgl.db import get_phone_fields
+
+from .cache import delete_cached_parties
+from .models import Company, Individual
+from .settings import (DEDUPE_COMPANY_SUFFIXES, DEDUPE_MAX_BLOCK_SIZE,
+                       DEDUPE_THRESHOLD)
+
+# Name fields of every party model.
+PARTY_NAME_FIELDS = {
+    Individual: ('first_name', 'last_name'),
+    Company: ('company_name',),
+}
+
+# Address fields compared between parties.
+PARTY_ADDRESS_FIELDS = (
+    'address_line1',
+    'postal_code',
+)
+
+# Similarity added to parties sharing a phone number.
+PHONE_BONUS = 0.1
+
+# Rows normalized and blocks compared by a worker at once.
+DEDUPE_CHUNK_SIZE = 10000
+
+# Sent with the target and the primary keys of merged parties.
+parties_merged = Signal()
+
+PartyRecord = namedtuple(
+    'PartyRecord',
+    ['pk', 'created_at', 'name', 'address', 'email', 'phones', 'keys']
+)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize_text(value):
+    """Normalize a text into lowercase words without accents."""
+    # Dots are dropped so abbreviations such as C.A. are single words.
+    value = str(value or '').replace('.', '')
+    if not value.isascii():
+        value = ''.join(
+            char for char in unicodedata.normalize('NFKD', value)
+            if not unicodedata.combining(char)
+        )
+    return WORD_RE.findall(value.casefold())
+
+
+def get_dedupe_fields(model):
+    """Get the fields read to compare the parties of a model."""
+    return [
+        'pk',
+        'created_at',
+        *PARTY_NAME_FIELDS[model],
+        *PARTY_ADDRESS_FIELDS,
+        'email',
+        *(field.name for field in get_phone_fields(model)),
+    ]
+
+
+def get_record(model, fields, phone_fields, row):
+    """Get the normalized record and blocking keys of a party row."""
+    values = dict(zip(fields, row))
+    name = [
+        word for field in PARTY_NAME_FIELDS[model]
+        for word in normalize_text(values[field])
+    ]
+    if model is Company:
+        name = [word for word in name if word not in DEDUPE_COMPANY_SUFFIXES]
+    line = ' '.join(normalize_text(values['address_line1']))
+    postal_code = ''.join(normalize_text(values['postal_code']))
+    email = (values['email'] or '').strip().casefold()
+    phones = frozenset(
+        digits[-10:] for digits in (
+            re.sub(r'\D', '', str(values[field]))
+            for field in phone_fields if values[field]
+        ) if len(digits) >= 7
+    )
+    # Same words in any casing, order or punctuation share a block.
+    keys = ['n:' + ''.join(sorted(name))[:12]] if name else []
+    if email:
+        keys.append('e:' + email)
+    keys += ['p:' + phone for phone in phones]
+    if postal_code and line:
+        keys.append('a:{0}:{1}'.format(postal_code, line[:8]))
+    return PartyRecord(
+        values['pk'],
+        values['created_at'],
+        ' '.join(name),
+        ' '.join(value for value in (line, postal_code) if value),
+        email,
+        phones,
+        keys
+    )
+
+
+def get_records(model, rows):
+    """Get the records of a chunk of party rows."""
+    fields = get_dedupe_fields(model)
+    phone_fields = [field.name for field in get_phone_fields(model)]
+    return [get_record(model, fields, phone_fields, row) for row in rows]
+
+
+def get_similarity(record, other):
+    """Get the similarity between two party records, from 0 to 1."""
+    if record.email and record.email == other.email:
+        return 1.0
+    score = SequenceMatcher(None, record.name, other.name).ratio()
+    if record.address and other.address:
+        score = score * 0.8 + SequenceMatcher(
+            None, record.address, other.address
+        ).ratio() * 0.2
+    if record.phones & other.phones:
+        score = min(1.0, score + PHONE_BONUS)
+    return score
+
+
+def compare_blocks(blocks, threshold):
+    """
+    Compare every pair of records within each block, returns the primary
+    keys and similarity of the pairs above the threshold.
+    """
+    matches = []
+    for block in blocks:
+        for record, other in combinations(block, 2):
+            score = get_similarity(record, other)
+            if score >= threshold:
+                matches.append((record.pk, other.pk, score))
+    return matches
+
+
+def iter_chunks(iterable, size):
+    """Iterate an iterable in lists of a given size."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_clusters(records, matches):
+    """Group matched records into clusters with a union find."""
+    parents = {}
+
+    def find(pk):
+        parents.setdefault(pk, pk)
+        while parents[pk] != pk:
+            parents[pk] = parents[parents[pk]]
+            pk = parents[pk]
+        return pk
+
+    for pk, other, _score in matches:
+        parents[find(pk)] = find(other)
+    clusters = defaultdict(list)
+    for pk in parents:
+        clusters[find(pk)].append(records[pk])
+    # The oldest party of a cluster is the one kept on merge.
+    clusters = [
+        sorted(cluster, key=lambda record: (record.created_at, str(record.pk)))
+        for cluster in clusters.values()
+    ]
+    return sorted(clusters, key=lambda cluster: cluster[0].name)
+
+
+def find_duplicates(model, threshold=DEDUPE_THRESHOLD, workers=None,
+                    max_block_size=DEDUPE_MAX_BLOCK_SIZE):
+    """
+    Find the duplicate parties of a model. Rows are normalized into
+    blocking keys and only the records sharing a block are compared,
+    both steps on a process pool. Returns the clusters of duplicate
+    records and some statistics.
+    """
+    workers = workers or os.cpu_count() or 1
+    rows = model._default_manager.order_by().values_list(
+        *get_dedupe_fields(model)
+    ).iterator(chunk_size=DEDUPE_CHUNK_SIZE)
+    records = {}
+    blocks = defaultdict(list)
+    with ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup) as executor:
+        for chunk in executor.map(
+                get_records,
+                repeat(model),
+                iter_chunks(rows, DEDUPE_CHUNK_SIZE)):
+            for record in chunk:
+                records[record.pk] = record
+                for key in record.keys:
+                    blocks[key].append(record)
+        compared = [
+            block for block in blocks.values()
+            if 1 < len(block) <= max_block_size
+        ]
+        stats = {
+            'parties': len(records),
+            'blocks': len(compared),
+            'skipped_blocks': sum(
+                1 for block in blocks.values() if len(block) > max_block_size
+            ),
+            'comparisons': sum(
+                len(block) * (len(block) - 1) // 2 for block in compared
+            ),
+        }
+        del blocks
+        matches = {}
+        for chunk in executor.map(
+                compare_blocks,
+                iter_chunks(compared, DEDUPE_CHUNK_SIZE // 10),
+                repeat(threshold)):
+            for pk, other, score in chunk:
+                matches[frozenset((pk, other))] = (pk, other, score)
+    stats['pairs'] = len(matches)
+    return get_clusters(records, matches.values()), stats
+
+
+def merge_links(field, target, pks, reverse=False):
+    """
+    Move the many to many links of some parties to a target party,
+    skipping those the target already has. Returns the links moved.
+    """
+    through = field.remote_field.through
+    own, other = field.m2m_field_name(), field.m2m_reverse_field_name()
+    if reverse:
+        own, other = other, own
+    own = through._meta.get_field(own).attname
+    other = through._meta.get_field(other).attname
+    links = set(through._default_manager.filter(
+        **{own + '__in': pks}
+    ).values_list(other, flat=True))
+    through._default_manager.bulk_create(
+        [through(**{own: target.pk, other: pk}) for pk in links],
+        ignore_conflicts=True
+    )
+    through._default_manager.filter(**{own + '__in': pks}).delete()
+    delete_cached_parties(
+        field.model if reverse else field.related_model, links
+    )
+    return len(links)
+
+
+def get_merge_counts(model, pks):
+    """
+    Get the number of related rows and links of some parties moved by a
+    merge, with the related model and field verbose names.
+    """
+    counts = []
+    for relation in model._meta.related_objects:
+        field = relation.field
+        if relation.many_to_many:
+            queryset = field.remote_field.through._default_manager.filter(
+                **{field.m2m_reverse_field_name() + '__in': pks}
+            )
+        else:
+            queryset = relation.related_model._base_manager.filter(
+                **{field.name + '__in': pks}
+            )
+        counts.append((
+            relation.related_model._meta.verbose_name_plural,
+            field.verbose_name,
+            queryset.count()
+        ))
+    for field in model._meta.many_to_many:
+        queryset = field.remote_field.through._default_manager.filter(
+            **{field.m2m_field_name() + '__in': pks}
+        )
+        counts.append((
+            field.related_model._meta.verbose_name_plural,
+            field.verbose_name,
+            queryset.count()
+        ))
+    return [count for count in counts if count[2]]
+
+
+def merge_parties(target, duplicates):
+    """
+    Merge parties into a target party. Every foreign key and many to many
+    link to the duplicates is repointed to the target with one update per
+    relation, then the duplicates are deleted. Returns the number of rows
+    repointed.
+    """
+    model = type(target)
+    pks = [party.pk for party in duplicates if party.pk != target.pk]
+    if not pks:
+        return 0
+    now = timezone.now()
+    repointed = 0
+    with transaction.atomic():
+        for relation in model._meta.related_objects:
+            if relation.many_to_many:
+                repointed += merge_links(
+                    relation.field, target, pks, reverse=True
+                )
+                continue
+            related = relation.related_model
+            values = {relation.field.name: target}
+            # Updated rows are marked changed, so their caches expire.
+            if any(f.name == 'updated_at' for f in related._meta.fields):
+                values['updated_at'] = now
+            repointed += related._base_manager.filter(
+                **{relation.field.name + '__in': pks}
+            ).update(**values)
+        for field in model._meta.many_to_many:
+            repointed += merge_links(field, target, pks)
+        model._base_manager.filter(pk__in=pks).delete()
+        delete_cached_parties(model, [target.pk])
+        parties_merged.send(sender=model, target=target, pks=pks)
+    return repointed
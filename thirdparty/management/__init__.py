@@ -0,0 +1 @@
+"""thirdparty.management.__init__.py"""
@@ -0,0 +1 @@
+"""thirdparty.management.commands.__init__.py"""
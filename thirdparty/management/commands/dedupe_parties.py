@@ -0,0 +1,85 @@
+"""thirdparty.management.commands.dedupe_parties.py"""
+
+import csv
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from thirdparty.dedupe import find_duplicates
+from thirdparty.models import Company, Individual
+from thirdparty.settings import DEDUPE_MAX_BLOCK_SIZE, DEDUPE_THRESHOLD
+
+# Party models by name.
+PARTY_MODELS = {
+    'individual': Individual,
+    'company': Company,
+}
+
+
+class Command(BaseCommand):
+    """Report the duplicate parties of a model."""
+    help = (
+        'Find the duplicate individuals or companies, comparing only the '
+        'parties sharing a normalized name, email, phone or address, and '
+        'report them in clusters with the party kept on merge first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model',
+            choices=sorted(PARTY_MODELS),
+            help='Party model checked.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEDUPE_THRESHOLD,
+            help='Minimum similarity of duplicates, from 0 to 1.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of worker processes, by default one per CPU core.'
+        )
+        parser.add_argument(
+            '--max-block-size',
+            type=int,
+            default=DEDUPE_MAX_BLOCK_SIZE,
+            help='Skip the blocks with more parties than this.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the report to a CSV file instead.'
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        clusters, stats = find_duplicates(
+            PARTY_MODELS[options['model']],
+            threshold=options['threshold'],
+            workers=options['workers'],
+            max_block_size=options['max_block_size']
+        )
+        rows = [
+            (number, str(record.pk), record.name, record.email, index == 0)
+            for number, cluster in enumerate(clusters, 1)
+            for index, record in enumerate(cluster)
+        ]
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(['cluster', 'id', 'name', 'email', 'kept'])
+                writer.writerows(rows)
+        else:
+            for number, pk, name, email, kept in rows:
+                self.stdout.write('{0} {1} {2} {3}{4}'.format(
+                    number, pk, name, email, ' (kept)' if kept else ''
+                ))
+        self.stdout.write(
+            '{parties} parties, {blocks} blocks compared, {skipped_blocks} '
+            'blocks skipped, {comparisons} comparisons, {pairs} pairs, '
+            '{clusters} clusters in {elapsed:.1f} s'.format(
+                clusters=len(clusters),
+                elapsed=perf_counter() - start,
+                **stats
+            )
+        )
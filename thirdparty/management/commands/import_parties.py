@@ -0,0 +1,360 @@
+"""thirdparty.management.commands.import_parties.py"""
+
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import PurePath
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from netexgl.counts import add_daily_counts
+from phonenumber_field.modelfields import PhoneNumberField
+from phonenumber_field.phonenumber import PhoneNumber, to_python
+from reversion.models import Revision
+from thirdparty.models import Company, Individual
+
+# Party models by name.
+PARTY_MODELS = {
+    'individual': Individual,
+    'company': Company,
+}
+
+# Fields set by the import itself.
+SKIPPED_FIELDS = (
+    'created_at',
+    'updated_at',
+)
+
+# Column of the company rows with the ids of their individuals.
+INDIVIDUALS_COLUMN = 'individuals'
+
+# Name of the display column of every party model in the report.
+DISPLAY_FIELDS = {
+    Individual: 'first_name',
+    Company: 'company_name',
+}
+
+
+def read_rows(path, file_format):
+    """Read the rows of a CSV or JSON lines file as dictionaries."""
+    with open(path, encoding='utf-8', newline='') as lines:
+        if file_format == 'csv':
+            yield from csv.DictReader(lines)
+            return
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+def get_import_fields(model):
+    """Get the fields of a party model set from the imported rows."""
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in SKIPPED_FIELDS
+    ]
+
+
+def normalize_phones(values, phones):
+    """
+    Normalize a batch of phone numbers as they are stored, parsing each
+    distinct number once. Invalid numbers are kept as they are.
+    """
+    fmt = PhoneNumber.format_map[
+        getattr(settings, 'PHONENUMBER_DB_FORMAT', 'E164')
+    ]
+    for value in set(values) - phones.keys():
+        phone = to_python(value)
+        if phone.is_valid():
+            phones[value] = (phone.format_as(fmt), True)
+        else:
+            phones[value] = (value, False)
+
+
+class Command(BaseCommand):
+    """Bulk import parties through a staging table and COPY."""
+    help = (
+        'Import individuals or companies from a CSV or JSON lines file. '
+        'Rows are copied into a staging table with COPY and inserted in '
+        'a single statement, duplicates are skipped and reported. '
+        'Company rows can list the ids of their individuals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model',
+            choices=sorted(PARTY_MODELS),
+            help='Party model imported.'
+        )
+        parser.add_argument(
+            'path',
+            help='CSV or JSON lines file with the party field values.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='File format, by default from the file extension.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of rows normalized and copied at once.'
+        )
+
+    def handle(self, *args, **options):
+        model = PARTY_MODELS[options['model']]
+        file_format = options['format'] or (
+            'csv' if PurePath(options['path']).suffix.lower() == '.csv'
+            else 'jsonl'
+        )
+        fields = get_import_fields(model)
+        errors = []
+        now = timezone.now()
+        try:
+            rows = read_rows(options['path'], file_format)
+            with transaction.atomic():
+                total, rejected, links = self.copy_rows(
+                    model, fields, rows, max(1, options['batch_size']), errors
+                )
+                inserted, duplicates = self.insert_rows(model, fields, now)
+                linked = self.insert_links(links) if links else 0
+                add_daily_counts(model, [now] * inserted)
+                Revision.objects.create(
+                    date_created=now,
+                    comment='Imported {0} {1} from {2}.'.format(
+                        inserted,
+                        model._meta.verbose_name_plural,
+                        PurePath(options['path']).name
+                    )
+                )
+        except (OSError, ValueError, csv.Error) as error:
+            raise CommandError(error) from error
+
+        for line, field, error in errors:
+            self.stdout.write('line {0}: {1}: {2}'.format(line, field, error))
+        for line, name in duplicates:
+            self.stdout.write('line {0}: duplicate {1} {2}'.format(
+                line, model._meta.verbose_name, name
+            ))
+        self.stdout.write(
+            '{0} rows read, {1} {2} imported, {3} duplicates, '
+            '{4} rows rejected, {5} individuals linked.'.format(
+                total,
+                inserted,
+                model._meta.verbose_name_plural,
+                len(duplicates),
+                rejected,
+                linked
+            )
+        )
+
+    @staticmethod
+    def clean_row(fields, line, row, errors):
+        """
+        Clean the values of a row, returns them in field order or None if
+        the row cannot be imported. Errors are added to errors.
+        """
+        values = []
+        valid = True
+        for field in fields:
+            value = row.get(field.name)
+            if value in ('', None):
+                value = uuid4() if field.primary_key else None
+            if value is None and not field.null:
+                errors.append((line, field.name, 'missing value'))
+                valid = False
+            elif isinstance(field, PhoneNumberField):
+                value = None if value is None else str(value)
+            elif value is not None:
+                try:
+                    value = field.to_python(value)
+                except ValidationError as error:
+                    errors.append((line, field.name, error.messages[0]))
+                    valid = False
+            values.append(value)
+        return values if valid else None
+
+    def copy_rows(self, model, fields, rows, batch_size, errors): # pylint: disable=R0913,R0914
+        """
+        Copy the rows into a staging table in batches, returns the number
+        of rows read and rejected, and the company individual links.
+        Errors are added to errors.
+        """
+        columns = [field.column for field in fields]
+        quote_name = connection.ops.quote_name
+        phone_fields = [
+            (index, field) for index, field in enumerate(fields)
+            if isinstance(field, PhoneNumberField)
+        ]
+        pk_index = fields.index(model._meta.pk)
+        phones = {}
+        links = []
+        total = rejected = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE party_import ON COMMIT DROP AS '
+                'SELECT {0} FROM {1} WITH NO DATA'.format(
+                    ', '.join(quote_name(column) for column in columns),
+                    quote_name(model._meta.db_table)
+                )
+            )
+            cursor.execute('ALTER TABLE party_import ADD COLUMN line integer')
+            rows = iter(rows)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                cleaned = []
+                for row in batch:
+                    total += 1
+                    values = self.clean_row(fields, total, row, errors)
+                    if values is None:
+                        rejected += 1
+                        continue
+                    cleaned.append((total, values))
+                    if model is not Company:
+                        continue
+                    individuals = row.get(INDIVIDUALS_COLUMN) or []
+                    if isinstance(individuals, str):
+                        individuals = individuals.split('|')
+                    links += [
+                        (values[pk_index], individual.strip())
+                        for individual in individuals if individual.strip()
+                    ]
+                self.normalize_batch(cleaned, phone_fields, phones, errors)
+                buff = io.StringIO()
+                writer = csv.writer(buff)
+                for line, values in cleaned:
+                    writer.writerow(values + [line])
+                buff.seek(0)
+                cursor.copy_expert(
+                    'COPY party_import ({0}, line) FROM STDIN '
+                    'WITH (FORMAT csv)'.format(
+                        ', '.join(quote_name(column) for column in columns)
+                    ),
+                    buff
+                )
+        return total, rejected, links
+
+    @staticmethod
+    def normalize_batch(cleaned, phone_fields, phones, errors):
+        """
+        Normalize the phone numbers of a batch of rows, with the numbers
+        already normalized in phones. Errors are added to errors.
+        """
+        for index, field in phone_fields:
+            normalize_phones(
+                [
+                    values[index] for _line, values in cleaned
+                    if values[index] is not None
+                ],
+                phones
+            )
+            for line, values in cleaned:
+                if values[index] is None:
+                    continue
+                values[index], valid = phones[values[index]]
+                if not valid:
+                    errors.append(
+                        (line, field.name, 'invalid phone number kept as is')
+                    )
+
+    @staticmethod
+    def insert_rows(model, fields, now):
+        """
+        Insert the staged rows in file order, skipping those conflicting
+        with a unique field, and keep the ids inserted in a staging table.
+        Returns the number of rows inserted and the line and name of the
+        duplicates.
+        """
+        quote_name = connection.ops.quote_name
+        columns = ', '.join(
+            quote_name(field.column) for field in fields
+        )
+        pk = quote_name(model._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE party_import_inserted ON COMMIT DROP '
+                'AS SELECT {0} FROM {1} WITH NO DATA'.format(
+                    pk, quote_name(model._meta.db_table)
+                )
+            )
+            cursor.execute(
+                '''
+                WITH inserted AS (
+                    INSERT INTO {0} ({1}, created_at, updated_at)
+                    SELECT {1}, %s, %s FROM party_import ORDER BY line
+                    ON CONFLICT DO NOTHING
+                    RETURNING {2}
+                ), kept AS (
+                    INSERT INTO party_import_inserted SELECT {2} FROM inserted
+                )
+                SELECT
+                    (SELECT COUNT(*) FROM inserted),
+                    staged.line,
+                    staged.{3}
+                FROM party_import AS staged
+                LEFT JOIN inserted ON inserted.{2} = staged.{2}
+                WHERE inserted.{2} IS NULL
+                UNION ALL
+                SELECT (SELECT COUNT(*) FROM inserted), NULL, NULL
+                ORDER BY 2 NULLS FIRST
+                '''.format(
+                    quote_name(model._meta.db_table),
+                    columns,
+                    pk,
+                    quote_name(DISPLAY_FIELDS[model])
+                ),
+                [now, now]
+            )
+            rows = cursor.fetchall()
+        return rows[0][0], [(line, name) for _count, line, name in rows[1:]]
+
+    @staticmethod
+    def insert_links(links):
+        """
+        Link the companies inserted to their individuals, returns the
+        links inserted.
+        """
+        through = Company.individuals.through
+        quote_name = connection.ops.quote_name
+        try:
+            links = [
+                (str(UUID(str(company))), str(UUID(individual)))
+                for company, individual in links
+            ]
+        except ValueError as error:
+            raise ValueError('Invalid individual id: {0}'.format(error)) \
+                from error
+        buff = io.StringIO()
+        csv.writer(buff).writerows(links)
+        buff.seek(0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE party_import_links '
+                '(company_id uuid, individual_id uuid) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY party_import_links FROM STDIN WITH (FORMAT csv)', buff
+            )
+            # Links of skipped companies or unknown individuals are dropped.
+            cursor.execute(
+                '''
+                INSERT INTO {0} (company_id, individual_id)
+                SELECT links.company_id, links.individual_id
+                FROM party_import_links AS links
+                JOIN party_import_inserted AS company
+                    ON company.id = links.company_id
+                JOIN {1} AS individual ON individual.id = links.individual_id
+                ON CONFLICT DO NOTHING
+                '''.format(
+                    quote_name(through._meta.db_table),
+                    quote_name(Individual._meta.db_table)
+                )
+            )
+            return cursor.rowcount
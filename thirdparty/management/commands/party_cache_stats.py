@@ -0,0 +1,27 @@
+"""thirdparty.management.commands.party_cache_stats.py"""
+
+from django.core.management.base import BaseCommand
+from thirdparty.cache import get_party_cache_stats, reset_party_cache_stats
+
+
+class Command(BaseCommand):
+    """Report the hits and misses of the party cache."""
+    help = 'Report the hits, misses and hit ratio of the party cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after reporting them.'
+        )
+
+    def handle(self, *args, **options):
+        hits, misses = get_party_cache_stats()
+        total = hits + misses
+        self.stdout.write(
+            'hits {0}, misses {1}, hit ratio {2:.1%}'.format(
+                hits, misses, hits / total if total else 0
+            )
+        )
+        if options['reset']:
+            reset_party_cache_stats()
@@ -222,6 +222,7 @@ class Company(BaseModel):
 
     class Meta:
         verbose_name_plural = _('companies')
+        indexes = BaseModel.Meta.indexes
 
     def __str__(self):
         return str(self.company_name)
@@ -0,0 +1,42 @@
+"""thirdparty.settings.py"""
+
+# Seconds a party is kept on cache.
+PARTY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Count the hits and misses of the party cache, one more cache request
+# on each read.
+PARTY_CACHE_STATS = False
+
+# Address fields returned by the address views.
+ADDRESS_FIELDS = (
+    'address_line1',
+    'address_line2',
+    'city_district',
+    'state_province',
+    'postal_code',
+    'country',
+)
+
+# Minimum similarity of two parties to be reported as duplicates.
+DEDUPE_THRESHOLD = 0.9
+
+# Blocks with more parties are too common to compare and are skipped.
+DEDUPE_MAX_BLOCK_SIZE = 500
+
+# Words dropped from company names before comparing them.
+DEDUPE_COMPANY_SUFFIXES = (
+    'ca',
+    'co',
+    'corp',
+    'corporation',
+    'company',
+    'cv',
+    'gmbh',
+    'inc',
+    'llc',
+    'ltd',
+    'limited',
+    'sa',
+    'sac',
+    'srl',
+)
@@ -0,0 +1,44 @@
+"""thirdparty.signals.py"""
+
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from netexgl.db import create_phone_digits_indexes
+
+from .autocomplete import create_party_name_indexes
+from .cache import delete_cached_parties
+from .models import Company, Individual
+
+
+def setup_party_name_indexes(sender, using, **kwargs): # pylint: disable=W0613
+    """Create the party display name indexes after migrate."""
+    if connections[using].vendor == 'postgresql':
+        create_party_name_indexes(using)
+
+
+def setup_party_phone_indexes(sender, using, **kwargs): # pylint: disable=W0613
+    """Create the party phone number digits indexes after migrate."""
+    if connections[using].vendor != 'postgresql':
+        return
+    tables = connections[using].introspection.table_names()
+    for model in (Individual, Company):
+        if model._meta.db_table in tables:
+            create_phone_digits_indexes(model, using)
+
+
+@receiver(post_save, sender=Individual)
+@receiver(post_delete, sender=Individual)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def delete_cached_party(sender, instance, **kwargs): # pylint: disable=W0613
+    """Delete a changed party from cache."""
+    delete_cached_parties(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Company.individuals.through)
+def delete_cached_company_individuals(sender, instance, action, model, pk_set, **kwargs): # pylint: disable=W0613,R0913
+    """Delete from cache the parties of changed company individuals."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    delete_cached_parties(type(instance), [instance.pk])
+    delete_cached_parties(model, pk_set or [])
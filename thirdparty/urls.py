@@ -3,7 +3,8 @@
 from django.urls import path
 from django.utils.translation import ugettext_lazy as _
 
-from .views import CompanyAddressView, IndividualAddressView
+from .views import (CompanyAddressesView, CompanyAddressView,
+                    IndividualAddressesView, IndividualAddressView)
 
 urlpatterns = [
     path(
@@ -16,4 +17,14 @@ urlpatterns = [
         CompanyAddressView.as_view(),
         name='ajax_company_address'
     ),
+    path(
+        _('individual/ajax/addresses'),
+        IndividualAddressesView.as_view(),
+        name='ajax_individual_addresses'
+    ),
+    path(
+        _('company/ajax/addresses'),
+        CompanyAddressesView.as_view(),
+        name='ajax_company_addresses'
+    ),
 ]
@@ -1,49 +1,124 @@
 """thirdparty.views.py"""
 
+from calendar import timegm
+from hashlib import md5
+from uuid import UUID
+
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, JsonResponse
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         JsonResponse)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.generic.edit import View
 
+from .cache import get_parties
 from .models import Company, Individual
+from .settings import ADDRESS_FIELDS
 
+# Most parties returned by a batch address request.
+ADDRESS_BATCH_SIZE = 100
 
-class IndividualAddressView(LoginRequiredMixin, View):
-    """View to get individual address on JSON."""
+
+def get_address(obj):
+    """Get the address of a party."""
+    return {field: getattr(obj, field) for field in ADDRESS_FIELDS}
+
+
+def get_version(objs):
+    """Get the last modification timestamp and the ETag of parties."""
+    modified = [obj.updated_at or obj.created_at for obj in objs]
+    last_modified = timegm(max(modified).utctimetuple()) if modified else None
+    etag = md5(' '.join(sorted(
+        '{0}:{1}'.format(obj.pk, value.isoformat())
+        for obj, value in zip(objs, modified)
+    )).encode()).hexdigest()
+    return last_modified, quote_etag(etag)
+
+
+class AddressView(LoginRequiredMixin, View):
+    """Base view to get a party address on JSON."""
     login_url = 'login'
+    model = None
+
+    def get_objects(self, ids):
+        """
+        Get the addresses of some parties from cache, those not cached
+        are loaded in a single query.
+        """
+        return list(get_parties(self.model, ids, 'address').values())
+
+    def render(self, objs, data):
+        """
+        Render addresses on JSON, or 304 if the browser has the current
+        version of the parties.
+        """
+        last_modified, etag = get_version(objs)
+        response = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            response = JsonResponse(data)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     def get(self, request):
         """GET method."""
         query = self.request.GET.get('q')
         if query:
-            obj = Individual.objects.get(id=query)
-            data = {
-                'address_line1': obj.address_line1,
-                'address_line2': obj.address_line2,
-                'city_district': obj.city_district,
-                'state_province': obj.state_province,
-                'postal_code': obj.postal_code,
-                'country': obj.country,
-            }
-            return JsonResponse(data)
+            try:
+                objs = self.get_objects([UUID(query)])
+            except ValueError:
+                return HttpResponseBadRequest()
+            if not objs:
+                raise Http404
+            return self.render(objs, get_address(objs[0]))
         return HttpResponse('')
 
 
-class CompanyAddressView(LoginRequiredMixin, View):
-    """View to get company address on JSON."""
-    login_url = 'login'
+class AddressesView(AddressView):
+    """
+    Base view to get the addresses of many parties on JSON, by id. Ids
+    are given as repeated or comma separated q parameters.
+    """
 
     def get(self, request):
         """GET method."""
-        query = self.request.GET.get('q')
-        if query:
-            obj = Company.objects.get(id=query)
-            data = {
-                'address_line1': obj.address_line1,
-                'address_line2': obj.address_line2,
-                'city_district': obj.city_district,
-                'state_province': obj.state_province,
-                'postal_code': obj.postal_code,
-                'country': obj.country,
+        try:
+            ids = {
+                UUID(value)
+                for query in self.request.GET.getlist('q')
+                for value in query.split(',') if value
             }
-            return JsonResponse(data)
-        return HttpResponse('')
+        except ValueError:
+            return HttpResponseBadRequest()
+        if len(ids) > ADDRESS_BATCH_SIZE:
+            return HttpResponseBadRequest()
+        objs = self.get_objects(ids) if ids else []
+        return self.render(
+            objs, {str(obj.pk): get_address(obj) for obj in objs}
+        )
+
+
+class IndividualAddressView(AddressView):
+    """View to get individual address on JSON."""
+    model = Individual
+
+
+class CompanyAddressView(AddressView):
+    """View to get company address on JSON."""
+    model = Company
+
+
+class IndividualAddressesView(AddressesView):
+    """View to get the addresses of many individuals on JSON."""
+    model = Individual
+
+
+class CompanyAddressesView(AddressesView):
+    """View to get the addresses of many companies on JSON."""
+    model = Company